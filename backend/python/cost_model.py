@@ -0,0 +1,263 @@
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from resources import available_memory_bytes, MEMORY_FRACTION, CACHE_DIR
+from planner import MODEL_FIT_COST, MIN_TRAIN_ROWS, TIME_BUDGET_SECONDS, largest_rows_within
+
+try:
+    import resource
+except ImportError:
+    # Windows: fit memory is not measured, the memory prior is used as is
+    resource = None
+
+# Every train.py run appends the measured fit + predict time and peak memory of each
+# candidate here. The cost model is calibrated from these records.
+TIMINGS_PATH = os.path.join(CACHE_DIR, "fit_timings.jsonl")
+MAX_RECORDS_PER_MODEL = 200
+MAX_STORED_RECORDS = 5000
+
+# log(cost) = a + b * log(rows) + c * log(width) + d * log(class_factor), fit by ridge
+# regression shrunk towards the static planner.MODEL_FIT_COST prior. The intercept adapts
+# to the first record; the exponents need several records at different shapes to move.
+INTERCEPT_PRIOR_WEIGHT = 0.01
+EXPONENT_PRIOR_WEIGHT = 20.0
+
+# Fit cost grows with the class count for models that fit one booster/coefficient set per class
+MULTICLASS_MODELS = {"Logistic Regression", "Gradient Boosting Classifier", "XGBoost Classifier"}
+
+# Peak memory of a fit, in dense float64 copies of the training matrix
+MODEL_MEMORY_FACTOR = {
+    "Random Forest Regressor": 3.0,
+    "Random Forest Classifier": 3.0,
+    "Support Vector Regressor (SVR)": 4.0,
+    "Support Vector Classifier (SVC)": 4.0,
+    "KNN Classifier": 2.0
+}
+DEFAULT_MEMORY_FACTOR = 2.0
+
+# Ensembles whose cost is linear in their estimator count can be capped instead of subsampled
+CAP_PARAMS = {
+    "Random Forest Regressor": "n_estimators",
+    "Random Forest Classifier": "n_estimators",
+    "Gradient Boosting Regressor": "n_estimators",
+    "Gradient Boosting Classifier": "n_estimators",
+    "XGBoost Regressor": "n_estimators",
+    "XGBoost Classifier": "n_estimators"
+}
+MIN_CAPPED_ESTIMATORS = 10
+
+# train.py stops starting new candidates once this multiple of the budget has been spent
+OVERRUN_FACTOR = 1.5
+
+def class_factor(task_type, n_classes):
+    """Per-class work multiplier: binary and regression fits do one unit of work."""
+    return n_classes if task_type == "Classification" and n_classes > 2 else 1
+
+def _features(rows, width, classes):
+    return np.array([1.0, np.log(max(rows, 1)), np.log(max(width, 1)), np.log(max(classes, 1))])
+
+def load_timings(task_type, path=TIMINGS_PATH):
+    """Recorded timings of the task's models, newest MAX_RECORDS_PER_MODEL per model."""
+    records = {}
+    try:
+        with open(path) as f:
+            lines = f.readlines()
+    except OSError:
+        return records
+
+    kept = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        kept.append(line)
+        if record.get("task_type") == task_type:
+            records.setdefault(record["model"], []).append(record)
+
+    # Keep the store bounded: drop the oldest lines once it grows past MAX_STORED_RECORDS
+    if len(kept) > MAX_STORED_RECORDS:
+        try:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.writelines(kept[-MAX_STORED_RECORDS:])
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+    return {model: recs[-MAX_RECORDS_PER_MODEL:] for model, recs in records.items()}
+
+def record_timings(records, path=TIMINGS_PATH):
+    """Append timing records; one write per record so concurrent runs do not interleave lines."""
+    if not records:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+    except OSError:
+        pass
+
+def _current_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _peak_rss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+@contextmanager
+def measure_fit():
+    """
+    Wall time and peak memory of the block. Memory is only known if the block raised the
+    process peak above the memory in use when it started.
+    """
+    usage = {}
+    rss_before, peak_before = _current_rss(), _peak_rss()
+    start = time.perf_counter()
+    yield usage
+    usage["seconds"] = time.perf_counter() - start
+    peak_after = _peak_rss()
+    if rss_before is not None and peak_after is not None and peak_after > max(peak_before, rss_before):
+        usage["memory_bytes"] = peak_after - rss_before
+
+class FitCostModel:
+    """Predicted fit + predict time and peak memory of train.py's candidates, from dataset shape."""
+
+    def __init__(self, task_type, path=TIMINGS_PATH):
+        self.task_type = task_type
+        self.path = path
+        self.records = load_timings(task_type, path)
+        self._params = {}
+
+    def _prior(self, name, target):
+        if target == "seconds":
+            coef, exponent = MODEL_FIT_COST.get(self.task_type, {}).get(name, (1e-6, 1.0))
+            return np.array([np.log(coef), exponent, 1.0, 1.0 if name in MULTICLASS_MODELS else 0.0])
+        factor = MODEL_MEMORY_FACTOR.get(name, DEFAULT_MEMORY_FACTOR)
+        return np.array([np.log(8 * factor), 1.0, 1.0, 0.0])
+
+    def _fit(self, name, target):
+        key = (name, target)
+        if key not in self._params:
+            prior = self._prior(name, target)
+            # Older stores may hold zero or negative measurements, which have no log
+            records = [r for r in self.records.get(name, []) if (r.get(target) or 0) > 0]
+            A = np.array([_features(r["rows"], r["width"], r["classes"]) for r in records]).reshape(-1, 4)
+            b = np.log([r[target] for r in records])
+            penalty = np.diag([INTERCEPT_PRIOR_WEIGHT] + [EXPONENT_PRIOR_WEIGHT] * 3)
+            theta = np.linalg.solve(A.T @ A + penalty, A.T @ b + penalty @ prior)
+            if not np.all(np.isfinite(theta)):
+                theta, records = prior, []
+            self._params[key] = (theta, len(records))
+        return self._params[key]
+
+    def predict(self, name, rows, width, classes=1):
+        features = _features(rows, width, classes)
+        time_theta, n_timings = self._fit(name, "seconds")
+        memory_theta, _ = self._fit(name, "memory_bytes")
+        return {
+            "seconds": float(np.exp(features @ time_theta)),
+            "memory_bytes": float(np.exp(features @ memory_theta)),
+            "calibration_records": n_timings
+        }
+
+    def timing_record(self, name, rows, width, classes, usage, work_fraction=1.0):
+        """A store record for one measured fit, scaled back to the full (uncapped) configuration."""
+        record = {
+            "task_type": self.task_type,
+            "model": name,
+            "rows": int(rows),
+            "width": int(width),
+            "classes": int(classes),
+            "seconds": usage["seconds"] / work_fraction,
+            "recorded_at": time.time()
+        }
+        if usage.get("memory_bytes", 0) > 0:
+            record["memory_bytes"] = usage["memory_bytes"]
+        return record
+
+    def schedule(self, models, rows, width, n_classes, time_budget=TIME_BUDGET_SECONDS, memory_budget=None):
+        """
+        Decide how each candidate is trained within the time and memory budget.
+        Candidates are visited cheapest first; each may use a fair share of the time still left,
+        so cheap models leave their unused share to expensive ones. A candidate over its share is
+        capped (fewer estimators), else fit on a row subsample, else skipped.
+        Returns {name: decision} in training order.
+        """
+        classes = class_factor(self.task_type, n_classes)
+        memory_budget = memory_budget or available_memory_bytes() * MEMORY_FRACTION
+        predictions = {name: self.predict(name, rows, width, classes) for name in models}
+        order = sorted(models, key=lambda name: predictions[name]["seconds"])
+
+        decisions = {}
+        remaining = time_budget
+        for i, name in enumerate(order):
+            full = predictions[name]
+            allowance = remaining / (len(order) - i)
+            decision = {
+                "action": "run",
+                "rows": rows,
+                "full_predicted_seconds": round(full["seconds"], 3),
+                "calibration_records": full["calibration_records"]
+            }
+            cost = full
+
+            over_time = full["seconds"] > allowance
+            over_memory = full["memory_bytes"] > memory_budget
+            if over_time or over_memory:
+                reason = (f"predicted {full['seconds']:.1f}s exceeds its {allowance:.1f}s share of the time budget"
+                          if over_time else
+                          f"predicted {full['memory_bytes'] / 1024 ** 2:.0f}MB exceeds the {memory_budget / 1024 ** 2:.0f}MB memory budget")
+                cap_param = CAP_PARAMS.get(name)
+                current = models[name].get_params().get(cap_param) if cap_param else None
+                capped = int(current * allowance / full["seconds"]) if current else 0
+
+                if not over_memory and capped >= MIN_CAPPED_ESTIMATORS:
+                    decision.update(action="cap", params={cap_param: capped}, work_fraction=capped / current)
+                    cost = dict(full, seconds=full["seconds"] * capped / current)
+                else:
+                    def fits(r):
+                        p = self.predict(name, r, width, classes)
+                        return p["seconds"] <= allowance and p["memory_bytes"] <= memory_budget
+                    sub_rows = largest_rows_within(rows - 1, fits, MIN_TRAIN_ROWS)
+                    if sub_rows >= MIN_TRAIN_ROWS and fits(sub_rows):
+                        decision.update(action="subsample", rows=sub_rows)
+                        cost = self.predict(name, sub_rows, width, classes)
+                    else:
+                        decision.update(action="skip", rows=0)
+                        cost = {"seconds": 0.0, "memory_bytes": 0.0}
+                        reason += f"; not even {MIN_TRAIN_ROWS} rows fit"
+                decision["reason"] = reason
+
+            decision["predicted_seconds"] = round(cost["seconds"], 3)
+            decision["predicted_memory_mb"] = round(cost["memory_bytes"] / 1024 ** 2, 1)
+            remaining = max(remaining - cost["seconds"], 0.0)
+            decisions[name] = decision
+        return decisions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the predicted cost and schedule of train.py's candidates")
+    parser.add_argument("--task", required=True, choices=list(MODEL_FIT_COST), help="Task type")
+    parser.add_argument("--rows", type=int, required=True, help="Training rows")
+    parser.add_argument("--width", type=int, required=True, help="Encoded feature count")
+    parser.add_argument("--classes", type=int, default=2, help="Number of classes")
+    parser.add_argument("--budget", type=float, default=TIME_BUDGET_SECONDS, help="Time budget in seconds")
+    args = parser.parse_args()
+
+    from train import build_models
+    models = build_models(args.task)
+    cost_model = FitCostModel(args.task)
+    print(json.dumps(cost_model.schedule(models, args.rows, args.width, args.classes, args.budget)))
@@ -0,0 +1,264 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pandas as pd
+
+from resources import total_memory_bytes, CACHE_DIR
+
+# Share of total RAM the session cache may hold in memory. Least recently used
+# sessions beyond it are spilled to SPILL_DIR and reloaded on their next use.
+SESSION_MEMORY_FRACTION = float(os.environ.get("AUTOML_SESSION_MEMORY_FRACTION", 0.25))
+# Sessions idle for longer than this are dropped, spill file included
+SESSION_TTL_SECONDS = float(os.environ.get("AUTOML_SESSION_TTL", 6 * 3600))
+SPILL_DIR = os.path.join(CACHE_DIR, "sessions")
+
+READ_CHUNK_ROWS = 100000
+# String columns with at most this share of distinct values are stored as categories
+CATEGORY_MAX_RATIO = 0.5
+
+def compact_frame(df, categorical=None):
+    """
+    Downcast integer columns and store repetitive string columns as categories.
+    Floats stay float64 so statistics and models see the exact parsed values.
+    """
+    if categorical is None:
+        categorical = [
+            col for col in df.select_dtypes(include=['object']).columns
+            if df[col].nunique() <= CATEGORY_MAX_RATIO * max(len(df), 1)
+        ]
+    for col in df.select_dtypes(include=['integer']).columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    for col in categorical:
+        df[col] = df[col].astype('category')
+    return df
+
+def restore_dtypes(df):
+    """Dtypes as pd.read_csv would have parsed them (object strings, int64), for code written against CSV input."""
+    restored = {}
+    for col, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            restored[col] = df[col].astype(object)
+        elif pd.api.types.is_integer_dtype(dtype) and dtype != 'int64':
+            restored[col] = df[col].astype('int64')
+    if not restored:
+        return df
+    df = df.copy(deep=False)
+    for col, values in restored.items():
+        df[col] = values
+    return df
+
+def _object_categories(column):
+    """
+    Categories as object dtype: a chunk where the column is entirely missing (or all numeric)
+    parses with float/int categories, which union_categoricals cannot combine with strings.
+    """
+    categories = column.cat.categories
+    return column if categories.dtype == object else column.cat.set_categories(categories.astype(object))
+
+def read_compact(file_path, chunk_rows=READ_CHUNK_ROWS):
+    """Read a CSV chunk by chunk, compacting each chunk, so peak memory stays near the compact size."""
+    chunks, categorical = [], None
+    for chunk in pd.read_csv(file_path, chunksize=chunk_rows):
+        if categorical is None:
+            # Decided on the first chunk, so every chunk stores the same columns as categories
+            categorical = [
+                col for col in chunk.select_dtypes(include=['object']).columns
+                if chunk[col].nunique() <= CATEGORY_MAX_RATIO * len(chunk)
+            ]
+        chunks.append(compact_frame(chunk, categorical))
+    if not chunks:
+        return pd.read_csv(file_path)
+    if len(chunks) == 1:
+        return chunks[0]
+
+    # Chunks have different category sets: concatenating them directly would fall back to object
+    columns = chunks[0].columns
+    df = pd.concat([chunk.drop(columns=categorical) for chunk in chunks], ignore_index=True)
+    for col in categorical:
+        df[col] = pd.api.types.union_categoricals([_object_categories(chunk[col]) for chunk in chunks], ignore_order=True)
+    return compact_frame(df[columns], categorical=[])
+
+class SessionNotFound(KeyError):
+    """No session with this id, and no source to open it from."""
+
+class DatasetSession:
+    """One parsed dataset. `version` increases every time an operation rewrites it in place."""
+
+    def __init__(self, session_id, source):
+        self.id = session_id
+        self.source = source
+        self.df = None
+        self.version = 0
+        self.nbytes = 0
+        self.spill_path = None
+        self.history = []
+        self.users = 0
+        # Snapshot files other processes are still reading; kept even once outdated
+        self.pinned = {}
+        self.created_at = time.time()
+        self.last_access = self.created_at
+        self.lock = threading.RLock()
+
+    def info(self):
+        return {
+            "session_id": self.id,
+            "source": self.source,
+            "version": self.version,
+            "rows": None if self.df is None else int(len(self.df)),
+            "columns": None if self.df is None else self.df.columns.tolist(),
+            "memory_mb": round(self.nbytes / 1024 ** 2, 1),
+            "resident": self.df is not None,
+            "history": self.history
+        }
+
+class DatasetStore:
+    """
+    Parsed DataFrames shared by preview, EDA, impute and train, keyed by session id.
+    Memory is bounded: least recently used sessions are spilled to disk as pickles
+    (dtypes preserved) and transparently reloaded.
+    """
+
+    def __init__(self, memory_budget=None, spill_dir=SPILL_DIR):
+        self.memory_budget = memory_budget or total_memory_bytes() * SESSION_MEMORY_FRACTION
+        self.spill_dir = spill_dir
+        self.sessions = OrderedDict()
+        self.lock = threading.RLock()
+        self.stats = {"hits": 0, "loads": 0, "reloads": 0, "spills": 0}
+
+    def _spill_path(self, session):
+        return os.path.join(self.spill_dir, f"{session.id}_v{session.version}.pkl")
+
+    def _resident_bytes(self):
+        return sum(s.nbytes for s in self.sessions.values() if s.df is not None)
+
+    def _spill(self, session):
+        """Write the session to disk (unless the current version already is) and free its memory."""
+        path = self._spill_path(session)
+        if session.spill_path != path or not os.path.exists(path):
+            os.makedirs(self.spill_dir, exist_ok=True)
+            session.df.to_pickle(path)
+            session.spill_path = path
+        session.df = None
+        self.stats["spills"] += 1
+
+    def _evict(self, keep=None):
+        """Spill least recently used, idle sessions until the resident set fits the budget."""
+        for session in list(self.sessions.values()):
+            if self._resident_bytes() <= self.memory_budget:
+                break
+            if session is keep or session.df is None or session.users:
+                continue
+            with session.lock:
+                self._spill(session)
+
+    def _expire(self):
+        now = time.time()
+        for session in list(self.sessions.values()):
+            if not session.users and now - session.last_access > SESSION_TTL_SECONDS:
+                self.drop(session.id)
+
+    def _load(self, session):
+        if session.df is not None:
+            self.stats["hits"] += 1
+            return
+        if session.spill_path and os.path.exists(session.spill_path):
+            session.df = pd.read_pickle(session.spill_path)
+            self.stats["reloads"] += 1
+        else:
+            session.df = read_compact(session.source)
+            session.nbytes = int(session.df.memory_usage(deep=True).sum())
+            self.stats["loads"] += 1
+
+    @contextmanager
+    def use(self, session_id, source=None):
+        """
+        Lock a session for one operation, loading it from its source or spill file if needed.
+        A session that does not exist yet is opened from `source`.
+        """
+        with self.lock:
+            self._expire()
+            session = self.sessions.get(session_id)
+            if session is None:
+                if not source:
+                    raise SessionNotFound(f"Session '{session_id}' not found")
+                session = DatasetSession(session_id, source)
+                self.sessions[session_id] = session
+            self.sessions.move_to_end(session_id)
+            session.users += 1
+
+        try:
+            with session.lock:
+                self._load(session)
+                session.last_access = time.time()
+                with self.lock:
+                    self._evict(keep=session)
+                yield session
+        except Exception:
+            # A session that never loaded (bad source) is not kept around
+            with self.lock:
+                if session.df is None and session.spill_path is None:
+                    self.sessions.pop(session_id, None)
+            raise
+        finally:
+            with self.lock:
+                session.users -= 1
+
+    def commit(self, session, operation):
+        """Record an in-place rewrite of session.df as a new version. Call while holding the session."""
+        session.version += 1
+        session.history.append(dict(operation, version=session.version, at=time.time()))
+        self._remove_spill(session)
+        session.nbytes = int(session.df.memory_usage(deep=True).sum())
+
+    def _remove_spill(self, session):
+        """Forget the spill file of an outdated version; delete it unless a snapshot reader holds it."""
+        path = session.spill_path
+        session.spill_path = None
+        if path and not session.pinned.get(path) and os.path.exists(path):
+            os.remove(path)
+
+    def snapshot(self, session):
+        """
+        Pickle of the current version for other processes (e.g. train.py), reused as its spill file.
+        The file is pinned until release_snapshot(), so a concurrent commit cannot delete it.
+        """
+        path = self._spill_path(session)
+        if session.spill_path != path or not os.path.exists(path):
+            os.makedirs(self.spill_dir, exist_ok=True)
+            session.df.to_pickle(path)
+            session.spill_path = path
+        with self.lock:
+            session.pinned[path] = session.pinned.get(path, 0) + 1
+        return path
+
+    def release_snapshot(self, session, path):
+        with self.lock:
+            session.pinned[path] -= 1
+            if session.pinned[path] > 0:
+                return
+            session.pinned.pop(path)
+            # Outdated version, or a session dropped while the snapshot was in use
+            stale = path != session.spill_path or session.id not in self.sessions
+        if stale and os.path.exists(path):
+            os.remove(path)
+
+    def drop(self, session_id):
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self._remove_spill(session)
+        session.df = None
+        return True
+
+    def status(self):
+        with self.lock:
+            return {
+                "sessions": [s.info() for s in self.sessions.values()],
+                "memory_budget_mb": round(self.memory_budget / 1024 ** 2, 1),
+                "resident_mb": round(self._resident_bytes() / 1024 ** 2, 1),
+                **self.stats
+            }
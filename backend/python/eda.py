@@ -7,6 +7,8 @@ import warnings
 
 warnings.filterwarnings("ignore")
 
+from planner import read_planned, plan_eda
+
 # Handle JSON serialization of numpy types
 class NpEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -18,7 +20,91 @@ class NpEncoder(json.JSONEncoder):
             return obj.tolist()
         return super(NpEncoder, self).default(obj)
 
-def recommend_model(df, target_column, task_type, correlation):
+# Above this many numeric columns the full p x p correlation matrix is replaced
+# by target correlations plus a sparse list of the strongest pairs.
+WIDE_COLUMN_THRESHOLD = 200
+
+def _standardize(values):
+    """Center and scale columns to unit variance. Constant columns become NaN."""
+    values = values - values.mean(axis=0)
+    std = values.std(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return values / np.where(std > 0, std, np.nan)
+
+def target_correlations(numeric_df, target_column, block_size=512):
+    """
+    Pearson correlation of every column against the target, computed block by block
+    so only `rows x block_size` values are materialized at a time.
+    """
+    features = [col for col in numeric_df.columns if col != target_column]
+    z_target = _standardize(numeric_df[target_column].to_numpy(dtype=np.float64))
+    n_rows = len(z_target)
+
+    corrs = {}
+    for start in range(0, len(features), block_size):
+        block = features[start:start + block_size]
+        z_block = _standardize(numeric_df[block].to_numpy(dtype=np.float64))
+        values = np.round(z_target @ z_block / n_rows, 2)
+        corrs.update({col: (None if np.isnan(v) else float(v)) for col, v in zip(block, values)})
+    return corrs
+
+def correlation_pairs(numeric_df, top_k=100, threshold=0.3, block_size=256):
+    """
+    Strongest feature-feature correlations as a sparse list, without building the full matrix.
+    Column blocks are standardized on the fly and multiplied pairwise; only pairs with
+    |corr| >= threshold are kept, trimmed to the top_k strongest.
+    """
+    columns = numeric_df.columns.tolist()
+    n_rows = len(numeric_df)
+    pairs_i, pairs_j, pairs_v = [], [], []
+
+    for i_start in range(0, len(columns), block_size):
+        z_i = _standardize(numeric_df.iloc[:, i_start:i_start + block_size].to_numpy(dtype=np.float64))
+        for j_start in range(i_start, len(columns), block_size):
+            z_j = _standardize(numeric_df.iloc[:, j_start:j_start + block_size].to_numpy(dtype=np.float64))
+            block_corr = z_i.T @ z_j / n_rows
+
+            # Keep each pair once (upper triangle) and skip the diagonal
+            rows, cols = np.nonzero(np.abs(np.nan_to_num(block_corr)) >= threshold)
+            keep = (i_start + rows) < (j_start + cols)
+            rows, cols = rows[keep], cols[keep]
+            pairs_i.append(i_start + rows)
+            pairs_j.append(j_start + cols)
+            pairs_v.append(block_corr[rows, cols])
+
+        # Trim candidates so memory stays bounded by top_k rather than p^2
+        if pairs_v:
+            pairs_i, pairs_j, pairs_v = [np.concatenate(pairs_i)], [np.concatenate(pairs_j)], [np.concatenate(pairs_v)]
+            if len(pairs_v[0]) > top_k:
+                top = np.argpartition(-np.abs(pairs_v[0]), top_k)[:top_k]
+                pairs_i, pairs_j, pairs_v = [pairs_i[0][top]], [pairs_j[0][top]], [pairs_v[0][top]]
+
+    if not pairs_v:
+        return []
+    order = np.argsort(-np.abs(pairs_v[0]))
+    return [
+        {"feature_a": columns[pairs_i[0][k]], "feature_b": columns[pairs_j[0][k]], "corr": round(float(pairs_v[0][k]), 2)}
+        for k in order
+    ]
+
+def mutual_information_scores(df_clean, categorical_columns, target_column, task_type):
+    """Mutual information between each (label encoded) categorical feature and the target."""
+    features = [col for col in categorical_columns if col != target_column and col in df_clean.columns]
+    if not features:
+        return {}
+
+    from sklearn.feature_selection import mutual_info_classif, mutual_info_regression
+
+    X = df_clean[features].to_numpy()
+    y = df_clean[target_column].to_numpy()
+    if task_type == "Regression":
+        scores = mutual_info_regression(X, y, discrete_features=True, random_state=42)
+    else:
+        # Class labels may be floats (e.g. 0.0/1.0), so factorize them first
+        scores = mutual_info_classif(X, pd.factorize(y)[0], discrete_features=True, random_state=42)
+    return {col: round(float(score), 4) for col, score in zip(features, scores)}
+
+def recommend_model(df, target_column, task_type, target_corrs):
     """
     Heuristic-based model recommendation.
     """
@@ -31,9 +117,9 @@ def recommend_model(df, target_column, task_type, correlation):
         if task_type == "Regression":
             # Check for linearity
             max_corr = 0
-            if correlation and target_column in correlation:
+            if target_corrs:
                 # Filter out the target itself
-                corrs = [abs(val) for key, val in correlation[target_column].items() if key != target_column and val is not None]
+                corrs = [abs(val) for key, val in target_corrs.items() if key != target_column and val is not None]
                 if corrs:
                     max_corr = max(corrs)
             
@@ -71,19 +157,16 @@ def recommend_model(df, target_column, task_type, correlation):
         
     return recommendation
 
-def analyze_relationships(df, target_column, correlation):
+def analyze_relationships(df, target_column, target_corrs):
     """
     Analyze relationships between features and target.
     """
     insights = []
     
-    if not target_column or not correlation or target_column not in correlation:
+    if not target_column or not target_corrs:
         return insights
         
     try:
-        # Get correlations with target
-        target_corrs = correlation[target_column]
-        
         # Sort by absolute correlation
         sorted_corrs = sorted(
             [(k, v) for k, v in target_corrs.items() if k != target_column and v is not None],
@@ -101,11 +184,12 @@ def analyze_relationships(df, target_column, correlation):
         
     return insights
 
-def perform_eda(file_path, target_column=None):
+def perform_eda(file_path, target_column=None, wide=False, corr_top_k=100, corr_threshold=0.3):
+    """EDA report for a CSV path/URL, or for a DataFrame held by the session service."""
     try:
         # OPTIMIZATION: Read only a subset of data for EDA to prevent system freeze
-        # 5,000 rows is sufficient for statistical summary and correlation analysis
-        df = pd.read_csv(file_path, nrows=5000)
+        # The planner sizes the sample from the column count, memory and the EDA time budget
+        df, plan = read_planned(file_path, plan_eda, "eda_rows")
         
         # Basic Info
         description = df.describe(include='all')
@@ -121,6 +205,7 @@ def perform_eda(file_path, target_column=None):
         cleaning_suggestions = []
         preprocessing_steps = []
         features_kept = []
+        encoded_columns = []
         
         # Track initial columns
         initial_columns = df.columns.tolist()
@@ -146,6 +231,7 @@ def perform_eda(file_path, target_column=None):
                  # Check cardinality
                  if df_clean[col].nunique() < 50 or col == target_column:
                      df_clean[col] = df_clean[col].astype('category').cat.codes
+                     encoded_columns.append(col)
                      preprocessing_steps.append({"step": "Encoding", "details": f"Label Encoded '{col}'"})
                  else:
                      # Drop high cardinality columns for correlation analysis to avoid noise
@@ -159,7 +245,14 @@ def perform_eda(file_path, target_column=None):
         # We use the cleaned dataframe for correlation
         numeric_df = df_clean.select_dtypes(include=[np.number])
         correlation = {}
-        if not numeric_df.empty:
+        correlation_mode = "full"
+        top_correlations = None
+        # Wide data: skip the full matrix and return only the strongest pairs
+        if wide or numeric_df.shape[1] > WIDE_COLUMN_THRESHOLD:
+            correlation_mode = "sparse"
+            if not numeric_df.empty:
+                top_correlations = correlation_pairs(numeric_df, top_k=corr_top_k, threshold=corr_threshold)
+        elif not numeric_df.empty:
             corr_df = numeric_df.corr()
             # Round for cleaner JSON and handle NaNs/Infs
             corr_df = corr_df.round(2)
@@ -170,6 +263,8 @@ def perform_eda(file_path, target_column=None):
         target_analysis = {}
         model_recommendation = {}
         key_relationships = []
+        target_corrs = {}
+        mutual_information = {}
         
         if target_column and target_column in df.columns:
             target_data = df[target_column]
@@ -193,12 +288,19 @@ def perform_eda(file_path, target_column=None):
                     target_analysis["class_distribution"] = target_data.value_counts().head(20).to_dict()
             
             target_analysis["type"] = target_type
+
+            # Target-vs-feature correlations (computed directly, no full matrix needed)
+            if target_column in numeric_df.columns:
+                target_corrs = target_correlations(numeric_df, target_column)
+
+                # Mutual information captures non-linear dependence of categorical features
+                mutual_information = mutual_information_scores(df_clean, encoded_columns, target_column, target_type)
             
             # Recommend Model
-            model_recommendation = recommend_model(df_clean, target_column, target_type, correlation)
+            model_recommendation = recommend_model(df_clean, target_column, target_type, target_corrs)
             
             # Analyze Relationships
-            key_relationships = analyze_relationships(df_clean, target_column, correlation)
+            key_relationships = analyze_relationships(df_clean, target_column, target_corrs)
 
         cleaned_description = df_clean.describe(include='all')
         cleaned_description = cleaned_description.replace([np.inf, -np.inf], np.nan)
@@ -208,7 +310,11 @@ def perform_eda(file_path, target_column=None):
             "description": description,
             "missing_values": missing_values,
             "dtypes": dtypes,
+            # Square matrix in "full" mode; empty in "sparse" mode (see top_correlations)
             "correlation": correlation,
+            "correlation_mode": correlation_mode,
+            "target_correlations": target_corrs,
+            "mutual_information": mutual_information,
             "target_analysis": target_analysis,
             "cleaning_suggestions": cleaning_suggestions,
             "preprocessing_steps": preprocessing_steps,
@@ -216,18 +322,26 @@ def perform_eda(file_path, target_column=None):
             "cleaned_summary": cleaned_description,
             "columns": df.columns.tolist(),
             "model_recommendation": model_recommendation,
-            "key_relationships": key_relationships
+            "key_relationships": key_relationships,
+            "plan": plan
         }
         
-        print(json.dumps(result, cls=NpEncoder))
+        if top_correlations is not None:
+            result["top_correlations"] = top_correlations
+        
+        return result
         
     except Exception as e:
-        print(json.dumps({"error": str(e)}))
+        return {"error": str(e)}
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--file", required=True, help="Path or URL to the CSV file")
     parser.add_argument("--target", required=False, help="Target column name")
+    parser.add_argument("--wide", action="store_true", help="Return a sparse list of the strongest correlations instead of the full matrix")
+    parser.add_argument("--corr_top_k", type=int, default=100, help="Number of correlation pairs kept in wide mode")
+    parser.add_argument("--corr_threshold", type=float, default=0.3, help="Minimum |corr| of pairs kept in wide mode")
     args = parser.parse_args()
     
-    perform_eda(args.file, args.target)
+    result = perform_eda(args.file, args.target, args.wide, args.corr_top_k, args.corr_threshold)
+    print(json.dumps(result, cls=NpEncoder))
@@ -0,0 +1,193 @@
+import hashlib
+import os
+
+import joblib
+import numpy as np
+from scipy import stats
+from sklearn.base import BaseEstimator
+from sklearn.feature_selection import SelectorMixin
+
+from resources import CACHE_DIR
+
+try:
+    from sklearn.utils.validation import validate_data
+except ImportError:
+    # scikit-learn < 1.6
+    def validate_data(estimator, *args, **kwargs):
+        return estimator._validate_data(*args, **kwargs)
+
+# Scores are cached per (data hash, task) under CACHE_DIR, so re-runs on the same
+# data and target skip scoring entirely; the least recently used files beyond
+# MAX_CACHED_SCORES are removed
+MAX_CACHED_SCORES = 200
+SCORERS = ['f_test', 'chi2', 'correlation', 'mutual_info']
+# Mutual information is kNN based; score it on a row sample to keep it cheap
+MUTUAL_INFO_MAX_ROWS = 5000
+# Regression targets are binned into quantiles for chi2
+CHI2_TARGET_BINS = 10
+# 'auto' threshold: keep features significant at this level (f_test, correlation, chi2)
+# or with mutual information above the estimator's noise floor
+SIGNIFICANCE_LEVEL = 0.05
+MUTUAL_INFO_FLOOR = 0.01
+
+def _one_hot(labels):
+    _, codes = np.unique(labels, return_inverse=True)
+    Y = np.zeros((len(codes), codes.max() + 1))
+    Y[np.arange(len(codes)), codes] = 1.0
+    return Y
+
+def _class_statistics(X, X_sq, Y):
+    """ANOVA F, chi2 and correlation ratio of every column against a one-hot target, with p-values."""
+    n, k = Y.shape
+    class_counts = Y.sum(axis=0)
+    class_sums = Y.T @ X
+
+    total_sum = X.sum(axis=0)
+    ss_total = X_sq.sum(axis=0) - total_sum ** 2 / n
+    ss_between = (class_sums ** 2 / class_counts[:, None]).sum(axis=0) - total_sum ** 2 / n
+    ss_within = ss_total - ss_between
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f_test = (ss_between / max(k - 1, 1)) / (ss_within / max(n - k, 1))
+        correlation = np.sqrt(np.clip(ss_between / ss_total, 0, 1))
+
+        # chi2 needs non-negative features: shift every column to start at 0
+        observed = class_sums - X.min(axis=0) * class_counts[:, None]
+        expected = np.outer(class_counts / n, observed.sum(axis=0))
+        chi2 = ((observed - expected) ** 2 / expected).sum(axis=0)
+
+    f_pvalue = stats.f.sf(f_test, max(k - 1, 1), max(n - k, 1))
+    chi2_pvalue = stats.chi2.sf(chi2, max(k - 1, 1))
+    return f_test, chi2, correlation, f_pvalue, chi2_pvalue
+
+def compute_scores(X, y, task_type, include_mutual_info=False):
+    """
+    All cheap filter scores in one pass over X (a few matrix products).
+    Returns {scorer: scores}, plus p-values for the 'auto' threshold.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    X_sq = X ** 2
+
+    if task_type == "Regression":
+        y = y.astype(np.float64)
+        n = len(y)
+        X_centered_sum = X.sum(axis=0)
+        cov = X.T @ (y - y.mean()) / n
+        std_x = np.sqrt(np.maximum(X_sq.sum(axis=0) / n - (X_centered_sum / n) ** 2, 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = cov / (std_x * y.std())
+            f_test = r ** 2 / (1 - r ** 2) * (n - 2)
+        f_pvalue = stats.f.sf(f_test, 1, max(n - 2, 1))
+        # chi2 against quantile bins of the target
+        bins = np.unique(np.quantile(y, np.linspace(0, 1, CHI2_TARGET_BINS + 1)[1:-1]))
+        _, chi2, _, _, chi2_pvalue = _class_statistics(X, X_sq, _one_hot(np.digitize(y, bins)))
+        correlation = np.abs(r)
+    else:
+        f_test, chi2, correlation, f_pvalue, chi2_pvalue = _class_statistics(X, X_sq, _one_hot(y))
+
+    scores = {"f_test": f_test, "chi2": chi2, "correlation": correlation}
+    # Correlation and F rank features identically, so they share the F-test p-value
+    pvalues = {"f_test": f_pvalue, "chi2": chi2_pvalue, "correlation": f_pvalue}
+
+    if include_mutual_info:
+        from sklearn.feature_selection import mutual_info_classif, mutual_info_regression
+        if len(y) > MUTUAL_INFO_MAX_ROWS:
+            idx = np.random.RandomState(42).choice(len(y), MUTUAL_INFO_MAX_ROWS, replace=False)
+            X, y = X[idx], y[idx]
+        mi = mutual_info_regression if task_type == "Regression" else mutual_info_classif
+        scores["mutual_info"] = mi(X, y, random_state=42)
+
+    scores = {name: np.nan_to_num(values, nan=0.0, posinf=0.0) for name, values in scores.items()}
+    scores.update({f"{name}_pvalue": np.nan_to_num(values, nan=1.0) for name, values in pvalues.items()})
+    return scores
+
+def data_hash(X, y):
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(X, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    digest.update(str(np.shape(X)).encode())
+    return digest.hexdigest()
+
+def _evict_cached_scores(cache_dir, keep=MAX_CACHED_SCORES):
+    """Remove the least recently used score files (by mtime) beyond keep."""
+    try:
+        entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith(".pkl")]
+        if len(entries) <= keep:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+    except OSError:
+        return
+    for entry in entries[:len(entries) - keep]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            # Already removed by a concurrent run
+            pass
+
+def cached_scores(X, y, task_type, scorer, cache_dir=None):
+    """Scores for X/y from the local cache, computing and storing them on a miss."""
+    cache_dir = cache_dir or os.path.join(CACHE_DIR, "feature_scores")
+    path = os.path.join(cache_dir, f"{data_hash(X, y)}_{task_type}.pkl")
+
+    scores = {}
+    if os.path.exists(path):
+        try:
+            scores = joblib.load(path)
+        except Exception:
+            scores = {}
+    if scorer in scores:
+        # Mark as recently used so eviction keeps it
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return scores, True
+
+    scores.update(compute_scores(X, y, task_type, include_mutual_info=(scorer == 'mutual_info')))
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        joblib.dump(scores, path)
+    except OSError:
+        pass
+    _evict_cached_scores(cache_dir)
+    return scores, False
+
+class FilterSelector(SelectorMixin, BaseEstimator):
+    """
+    Keep features whose filter score passes the threshold:
+    'auto' (significant at SIGNIFICANCE_LEVEL, or mutual information above MUTUAL_INFO_FLOOR),
+    'mean' of all scores, or a fixed score. Scores are cached per data hash and task.
+    The fitted mask lives in the pipeline, so predict.py only applies it.
+    """
+
+    def __init__(self, scorer='f_test', task_type='Classification', threshold='auto', cache_dir=None):
+        self.scorer = scorer
+        self.task_type = task_type
+        self.threshold = threshold
+        self.cache_dir = cache_dir
+
+    def fit(self, X, y):
+        X, y = validate_data(self, X, y)
+        if self.scorer not in SCORERS:
+            raise ValueError(f"Unknown feature scorer: {self.scorer}. Use one of {SCORERS}.")
+
+        scores, self.cache_hit_ = cached_scores(X, y, self.task_type, self.scorer, self.cache_dir)
+        self.scores_ = scores[self.scorer]
+
+        if self.threshold == 'auto' and self.scorer == 'mutual_info':
+            mask = self.scores_ > MUTUAL_INFO_FLOOR
+        elif self.threshold == 'auto':
+            mask = scores[f"{self.scorer}_pvalue"] < SIGNIFICANCE_LEVEL
+        elif self.threshold == 'mean':
+            mask = self.scores_ >= self.scores_.mean()
+        else:
+            mask = self.scores_ >= float(self.threshold)
+
+        if not mask.any():
+            mask[np.argmax(self.scores_)] = True
+        self.support_mask_ = mask
+        return self
+
+    def _get_support_mask(self):
+        return self.support_mask_
@@ -3,12 +3,32 @@ import pandas as pd
 import json
 import argparse
 
-def get_metadata(file_path):
+from serialize import emit, OUTPUT_FORMATS
+from planner import plan_metadata, PROBE_ROWS
+from dataset_cache import restore_dtypes
+
+def frame_metadata(df):
+    """Metadata and preview of a DataFrame already in memory (session service): no file scan needed."""
+    sample = restore_dtypes(df.head(PROBE_ROWS))
+    plan = plan_metadata(None, sample, total_rows=len(df))
+    metadata = {
+        "columns": df.columns.tolist(),
+        "rowCount": len(df),
+        "columnCount": len(df.columns),
+        "dtypes": sample.dtypes.astype(str).to_dict(),
+        "missingCounts": df.isnull().sum().to_dict(),
+        "plan": plan
+    }
+    return metadata, sample.head(plan["preview_rows"])
+
+def get_metadata(file_path, output_format='json'):
     try:
 
-        # Optimization: Read first 100 rows for preview. 
+        # Optimization: Read a small sample to plan the scan, and keep at most 100 rows for preview.
         # 1000 was causing performance issues on frontend and backend. 100 is sufficient.
-        df_preview = pd.read_csv(file_path, nrows=100)
+        sample = pd.read_csv(file_path, nrows=PROBE_ROWS)
+        plan = plan_metadata(file_path, sample)
+        df_preview = sample.head(plan["preview_rows"])
         
         # Initialize missing counts
         missing_counts = pd.Series(0, index=df_preview.columns)
@@ -18,7 +38,7 @@ def get_metadata(file_path):
         try:
             # We need to read all columns to count missing values, so we can't use usecols=[0] anymore
             # But we can still use chunks to be memory efficient
-            for chunk in pd.read_csv(file_path, chunksize=5000):
+            for chunk in pd.read_csv(file_path, chunksize=plan["chunk_rows"]):
                 row_count += len(chunk)
                 # Align chunk columns with preview columns to ensure safety
                 # (In case of weird CSVs, but usually they match)
@@ -35,26 +55,25 @@ def get_metadata(file_path):
                  row_count = len(df_preview)
                  missing_counts = df_preview.isnull().sum()
 
-        # Replace NaN with None (which becomes null in JSON) to avoid "NaN" in output
-        # Node.js JSON.parse fails on NaN
-        df_preview = df_preview.replace({float('nan'): None})
-        
         metadata = {
             "columns": df_preview.columns.tolist(),
             "rowCount": row_count,
             "columnCount": len(df_preview.columns),
             "dtypes": df_preview.dtypes.astype(str).to_dict(),
-            "preview": df_preview.to_dict(orient='records'),
-            "missingCounts": missing_counts.to_dict()
+            "missingCounts": missing_counts.to_dict(),
+            "plan": plan
         }
         
-        print(json.dumps(metadata))
+        # emit replaces NaN with None (which becomes null in JSON) to avoid "NaN" in output
+        # Node.js JSON.parse fails on NaN
+        emit(metadata, {"preview": df_preview}, output_format)
     except Exception as e:
         print(json.dumps({"error": str(e)}))
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--file", required=True, help="Path or URL to the CSV file")
+    parser.add_argument("--format", required=False, default="json", choices=OUTPUT_FORMATS, help="Output encoding (json, columnar or ndjson)")
     args = parser.parse_args()
     
-    get_metadata(args.file)
+    get_metadata(args.file, args.format)
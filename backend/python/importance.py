@@ -0,0 +1,131 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+N_REPEATS = 5
+# Seconds all permuted predictions together may take, or this many predict passes over
+# X_test if that is longer. Rows are only subsampled when the measured cost exceeds it.
+IMPORTANCE_TIME_BUDGET_SECONDS = float(os.environ.get("AUTOML_IMPORTANCE_TIME_BUDGET", 5))
+MAX_PREDICT_MULTIPLE = 10
+MIN_EVAL_ROWS = 100
+MIN_REPEATS = 2
+# Largest stacked batch handed to one predict call
+MAX_BATCH_BYTES = 64 * 1024 ** 2
+
+def source_columns(pipeline):
+    """
+    Original column name of every column the model sees, following train.py's pipeline:
+    ColumnTransformer (one-hot columns map back to their source column), then the
+    variance and feature-selection masks.
+    """
+    preprocessor = pipeline.named_steps['preprocessor']
+    sources = []
+    for name, transformer, columns in preprocessor.transformers_:
+        # Branches without columns (e.g. no categoricals) are never fitted and add no outputs
+        if name == 'remainder' or transformer == 'drop' or len(columns) == 0:
+            continue
+        steps = transformer.steps if isinstance(transformer, Pipeline) else [(name, transformer)]
+        current = list(columns)
+        for _, step in steps:
+            if isinstance(step, OneHotEncoder):
+                current = [col for col, categories in zip(current, step.categories_) for _ in categories]
+            elif hasattr(step, 'get_feature_names_out'):
+                # Imputers drop all-missing columns; scalers keep names one to one
+                current = list(step.get_feature_names_out(current))
+        sources.extend(current)
+
+    sources = np.array(sources, dtype=object)
+    for step_name in ('variance_threshold', 'feature_selection'):
+        if step_name in pipeline.named_steps:
+            sources = sources[pipeline.named_steps[step_name].get_support()]
+    return sources.tolist()
+
+def _scores(task_type, y_true, predictions):
+    """Score of every repeat at once: predictions has shape (repeats, rows)."""
+    if task_type == "Regression":
+        ss_res = ((predictions - y_true) ** 2).sum(axis=1)
+        ss_tot = ((y_true - y_true.mean()) ** 2).sum()
+        return 1 - ss_res / ss_tot if ss_tot > 0 else np.zeros(len(predictions))
+    return (predictions == y_true).mean(axis=1)
+
+def permutation_importance(model, pipeline, X_test, y_test, task_type, n_jobs=1, n_repeats=N_REPEATS, random_state=42):
+    """
+    Permutation importance of the original columns (R2 / accuracy drop when a column is shuffled).
+    All columns derived from one original column (e.g. its one-hot columns) are permuted together.
+    Every repeat of a column is stacked into one batch, so the model predicts once per column
+    (or a few times for very large batches) instead of once per column and repeat.
+    Columns are scored on n_jobs threads, unless the model already predicts on several cores.
+    """
+    X_test = np.asarray(X_test, dtype=np.float64)
+    y_test = np.asarray(y_test)
+    n_rows, width = X_test.shape
+    rng = np.random.RandomState(random_state)
+
+    sources = source_columns(pipeline)
+    if len(sources) != width:
+        # Unknown pipeline layout: attribute to the model's own columns
+        sources = [f"feature_{i}" for i in range(width)]
+    groups = {}
+    for i, col in enumerate(sources):
+        groups.setdefault(col, []).append(i)
+
+    start = time.perf_counter()
+    full_predictions = model.predict(X_test)
+    single_pass = time.perf_counter() - start
+
+    # Permuted predictions cost about one pass per column and repeat. Subsample the rows
+    # (then the repeats) only when that exceeds the budget.
+    budget_rows = n_rows * max(MAX_PREDICT_MULTIPLE, IMPORTANCE_TIME_BUDGET_SECONDS / max(single_pass, 1e-9))
+    eval_rows = min(n_rows, int(budget_rows // (len(groups) * n_repeats)))
+    if eval_rows < MIN_EVAL_ROWS:
+        n_repeats = int(max(MIN_REPEATS, min(n_repeats, budget_rows // (len(groups) * MIN_EVAL_ROWS))))
+        eval_rows = min(n_rows, int(max(MIN_EVAL_ROWS, budget_rows // (len(groups) * n_repeats))))
+    if eval_rows < n_rows:
+        idx = rng.choice(n_rows, eval_rows, replace=False)
+        X_eval, y_eval = X_test[idx], y_test[idx]
+        baseline = _scores(task_type, y_eval, np.asarray(full_predictions)[idx][None, :])[0]
+    else:
+        X_eval, y_eval = X_test, y_test
+        baseline = _scores(task_type, y_eval, np.asarray(full_predictions)[None, :])[0]
+
+    repeats_per_batch = max(1, min(n_repeats, MAX_BATCH_BYTES // max(eval_rows * width * 8, 1)))
+    # Row permutations are drawn up front, so results do not depend on thread scheduling
+    permutations = {col: np.argsort(rng.random_sample((n_repeats, eval_rows)), axis=1) for col in groups}
+
+    def score_group(col):
+        cols = groups[col]
+        scores = []
+        for first in range(0, n_repeats, repeats_per_batch):
+            perms = permutations[col][first:first + repeats_per_batch]
+            batch = np.tile(X_eval, (len(perms), 1))
+            batch[:, cols] = X_eval[perms.ravel()][:, cols]
+            predictions = np.asarray(model.predict(batch)).reshape(len(perms), eval_rows)
+            scores.append(_scores(task_type, y_eval, predictions))
+        drops = baseline - np.concatenate(scores)
+        return {"feature": col, "importance": float(drops.mean()), "std": float(drops.std())}
+
+    # One level of parallelism: an estimator that predicts on several cores gets a single thread
+    workers = 1 if model.get_params().get("n_jobs") not in (None, 1) else max(1, n_jobs)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        importances = list(pool.map(score_group, groups))
+    elapsed = time.perf_counter() - start
+
+    importances.sort(key=lambda item: item["importance"], reverse=True)
+    batches_per_group = -(-n_repeats // repeats_per_batch)
+    return {
+        "method": "permutation",
+        "metric": "R2" if task_type == "Regression" else "Accuracy",
+        "baseline_score": float(baseline),
+        "n_repeats": int(n_repeats),
+        "eval_rows": int(eval_rows),
+        "predict_calls": int(len(groups) * batches_per_group + 1),
+        "seconds": round(elapsed + single_pass, 3),
+        # Cost relative to one predict pass over the whole X_test
+        "predict_pass_multiple": round((elapsed + single_pass) / single_pass, 1) if single_pass > 0 else None,
+        "importances": importances
+    }
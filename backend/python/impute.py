@@ -73,6 +73,58 @@ def impute_column_logic(df, col, strategy):
         "imputed_indices": missing_indices
     }, None
 
+def impute_frame(df, column=None, strategy=None):
+    """
+    Impute df in place. Returns the result without a temp_path; impute_data() writes the CSV,
+    the session service keeps the frame in memory as a new version instead.
+    """
+    results = []
+    columns_to_process = []
+    
+    if column and column != "ALL":
+        columns_to_process = [column]
+    else:
+        columns_to_process = df.columns.tolist()
+        
+    total_imputed = 0
+    imputed_indices_map = {}
+    
+    for col in columns_to_process:
+        # Skip if no missing values (optimization)
+        if df[col].isnull().sum() == 0:
+            continue
+            
+        res, err = impute_column_logic(df, col, strategy)
+        if err:
+            continue # Skip errors in bulk mode or handle? For single col it might throw.
+        
+        if res:
+            results.append(res)
+            total_imputed += res["missing_count"]
+            imputed_indices_map[col] = res["imputed_indices"]
+
+    if total_imputed == 0 and (column and column != "ALL"):
+         return {
+            "status": "success",
+            "message": f"Column '{column}' has no missing values.",
+            "imputed_count": 0
+        }
+    elif total_imputed == 0:
+         return {
+            "status": "success",
+            "message": "No missing values found in dataset.",
+            "imputed_count": 0
+        }
+
+    return {
+        "status": "success",
+        "message": f"Successfully imputed {total_imputed} missing values across {len(results)} columns.",
+        "imputed_count": total_imputed,
+        "imputed_indices": imputed_indices_map if len(results) > 1 else results[0]["imputed_indices"],
+        "strategy_used": "mixed" if len(results) > 1 else results[0]["strategy"],
+        "details": results
+    }
+
 def impute_data(file_path, column=None, strategy=None):
     try:
         # Handle URL or local file
@@ -83,58 +135,17 @@ def impute_data(file_path, column=None, strategy=None):
                 raise FileNotFoundError(f"File not found: {file_path}")
             df = pd.read_csv(file_path)
         
-        results = []
-        columns_to_process = []
-        
-        if column and column != "ALL":
-            columns_to_process = [column]
-        else:
-            columns_to_process = df.columns.tolist()
-            
-        total_imputed = 0
-        imputed_indices_map = {}
-        
-        for col in columns_to_process:
-            # Skip if no missing values (optimization)
-            if df[col].isnull().sum() == 0:
-                continue
-                
-            res, err = impute_column_logic(df, col, strategy)
-            if err:
-                continue # Skip errors in bulk mode or handle? For single col it might throw.
-            
-            if res:
-                results.append(res)
-                total_imputed += res["missing_count"]
-                imputed_indices_map[col] = res["imputed_indices"]
-
-        if total_imputed == 0 and (column and column != "ALL"):
-             return {
-                "status": "success",
-                "message": f"Column '{column}' has no missing values.",
-                "imputed_count": 0
-            }
-        elif total_imputed == 0:
-             return {
-                "status": "success",
-                "message": "No missing values found in dataset.",
-                "imputed_count": 0
-            }
+        result = impute_frame(df, column, strategy)
+        if result["imputed_count"] == 0:
+            return result
 
         # Save to a temporary file
         temp_filename = f"imputed_{int(pd.Timestamp.now().timestamp())}.csv"
         temp_path = os.path.abspath(temp_filename)
         df.to_csv(temp_path, index=False)
+        result["temp_path"] = temp_path
         
-        return {
-            "status": "success",
-            "message": f"Successfully imputed {total_imputed} missing values across {len(results)} columns.",
-            "imputed_count": total_imputed,
-            "temp_path": temp_path,
-            "imputed_indices": imputed_indices_map if len(results) > 1 else results[0]["imputed_indices"],
-            "strategy_used": "mixed" if len(results) > 1 else results[0]["strategy"],
-            "details": results
-        }
+        return result
 
     except Exception as e:
         return {"error": str(e)}
@@ -0,0 +1,268 @@
+import os
+
+import pandas as pd
+import requests
+
+from resources import available_memory_bytes, MEMORY_FRACTION
+from dataset_cache import restore_dtypes, SPILL_DIR
+
+# Seconds the training loop (all candidate models together) and EDA may take.
+TIME_BUDGET_SECONDS = float(os.environ.get("AUTOML_TIME_BUDGET", 60))
+EDA_TIME_BUDGET_SECONDS = float(os.environ.get("AUTOML_EDA_TIME_BUDGET", 10))
+
+PROBE_ROWS = 1000
+MIN_TRAIN_ROWS = 500
+MIN_EDA_ROWS = 1000
+MAX_ONEHOT_CARDINALITY = 50
+
+# Dense float64 copies of the encoded matrix alive at once during training
+# (raw frame, train/test split, pipeline output, model internals)
+MATRIX_COPIES = 6
+# Rows read per sampled row, so the random sample is drawn from a wider part of the file
+READ_OVERSAMPLE = 3
+# Preview payload is bounded by cells, not memory: keep it small for the browser
+PREVIEW_MAX_ROWS = 100
+PREVIEW_MAX_CELLS = 20000
+# Share of the memory budget one get_metadata.py chunk may use
+CHUNK_MEMORY_SHARE = 0.05
+# describe() + correlation cost per cell, in seconds
+EDA_SECONDS_PER_CELL = 2e-6
+
+# Rough fit + predict cost of every candidate in train.py:
+# seconds = coef * rows ** exponent * encoded_width
+MODEL_FIT_COST = {
+    "Regression": {
+        "Linear Regression": (2e-8, 1.0),
+        "Ridge Regression": (2e-8, 1.0),
+        "Lasso Regression": (5e-8, 1.0),
+        "Random Forest Regressor": (1e-6, 1.1),
+        "Gradient Boosting Regressor": (1.5e-6, 1.0),
+        "XGBoost Regressor": (3e-7, 1.0),
+        "Support Vector Regressor (SVR)": (5e-9, 2.0)
+    },
+    "Classification": {
+        "Logistic Regression": (1e-7, 1.0),
+        "Decision Tree Classifier": (1e-7, 1.1),
+        "Random Forest Classifier": (1e-6, 1.1),
+        "Gradient Boosting Classifier": (1.5e-6, 1.0),
+        "XGBoost Classifier": (3e-7, 1.0),
+        "KNN Classifier": (1e-9, 2.0),
+        "Support Vector Classifier (SVC)": (2.5e-8, 2.0)
+    }
+}
+
+def estimate_total_rows(file_path, sample):
+    """Estimate the row count from the file size and the sample's bytes per row."""
+    if len(sample) < PROBE_ROWS:
+        return len(sample)
+    try:
+        if os.path.exists(file_path):
+            size = os.path.getsize(file_path)
+        else:
+            size = int(requests.head(file_path, allow_redirects=True).headers.get("Content-Length", 0))
+    except Exception:
+        size = 0
+    sample_bytes = len(sample.to_csv(index=False).encode())
+    if not size or not sample_bytes:
+        return len(sample)
+    return max(len(sample), int(size / (sample_bytes / len(sample))))
+
+def encoded_width(sample):
+    """Columns after train.py's encoding: numeric kept, low-cardinality categoricals one-hot encoded."""
+    width = len(sample.select_dtypes(include='number').columns)
+    for col in sample.select_dtypes(exclude='number').columns:
+        cardinality = sample[col].nunique()
+        if cardinality <= MAX_ONEHOT_CARDINALITY:
+            width += cardinality
+    return max(width, 1)
+
+def probe(file_path, sample, total_rows=None):
+    """
+    Shape and per-row size of the dataset, from a sample of its first rows.
+    The row count of a CSV is only estimated: it sizes the plan, but never caps the rows read.
+    """
+    width = encoded_width(sample)
+    # A sample shorter than PROBE_ROWS is the whole file
+    known = total_rows is not None or len(sample) < PROBE_ROWS
+    return {
+        "total_rows_estimate": total_rows if total_rows is not None else estimate_total_rows(file_path, sample),
+        "total_rows_known": known,
+        "columns": len(sample.columns),
+        "encoded_width": width,
+        "bytes_per_raw_row": int(sample.memory_usage(deep=True).sum() / max(len(sample), 1)),
+        "bytes_per_encoded_row": width * 8
+    }
+
+def predicted_fit_seconds(task_type, rows, width):
+    models = MODEL_FIT_COST.get(task_type)
+    if models is None:
+        # Task not known yet: plan for the more expensive of the two model sets
+        return max(predicted_fit_seconds(task, rows, width) for task in MODEL_FIT_COST)
+    # Models are fit on the 80% train split
+    fit_rows = rows * 0.8
+    return sum(coef * fit_rows ** exponent * width for coef, exponent in models.values())
+
+def largest_rows_within(limit_rows, fits, min_rows):
+    """Largest row count <= limit_rows for which fits(rows) holds (binary search)."""
+    if limit_rows <= min_rows or fits(limit_rows):
+        return limit_rows
+    low, high = min_rows, limit_rows
+    while high - low > 1:
+        mid = (low + high) // 2
+        if fits(mid):
+            low = mid
+        else:
+            high = mid
+    return low
+
+def _train_rows(limit_rows, task_type, width):
+    return largest_rows_within(
+        limit_rows,
+        lambda rows: predicted_fit_seconds(task_type, rows, width) <= TIME_BUDGET_SECONDS,
+        MIN_TRAIN_ROWS
+    )
+
+def _row_cap(info, limit_rows):
+    """Only an exact row count may cap a limit; an estimate could drop real rows."""
+    return min(info["total_rows_estimate"], limit_rows) if info["total_rows_known"] else limit_rows
+
+def plan_training(file_path, sample, task_type=None, total_rows=None):
+    """
+    Choose how many rows train.py reads and trains on.
+    Rows are capped by the memory and time budgets only; expected_* rows size the job
+    from the estimated row count (e.g. for the scheduler's memory admission).
+    Without a task type the plan assumes the more expensive model set;
+    refine_training_plan() narrows it once the task is known.
+    """
+    info = probe(file_path, sample, total_rows)
+    memory_budget = available_memory_bytes() * MEMORY_FRACTION
+    width = info["encoded_width"]
+
+    memory_rows = int(memory_budget / (info["bytes_per_encoded_row"] * MATRIX_COPIES + info["bytes_per_raw_row"]))
+    row_limit = _row_cap(info, memory_rows)
+    train_rows = _train_rows(row_limit, task_type, width)
+    read_rows = max(min(row_limit, max(train_rows * READ_OVERSAMPLE, MIN_TRAIN_ROWS)), train_rows)
+    expected_train_rows = min(train_rows, info["total_rows_estimate"])
+
+    info.update({
+        "row_limit": row_limit,
+        "read_rows": read_rows,
+        "train_rows": train_rows,
+        "expected_read_rows": min(read_rows, info["total_rows_estimate"]),
+        "expected_train_rows": expected_train_rows,
+        "memory_budget_mb": round(memory_budget / 1024 ** 2, 1),
+        "time_budget_seconds": TIME_BUDGET_SECONDS,
+        "predicted_fit_seconds": round(predicted_fit_seconds(task_type, expected_train_rows, width), 2)
+    })
+    return info
+
+def refine_training_plan(plan, task_type):
+    """Re-plan the training sample for the detected task, within the rows already read."""
+    plan = dict(plan, task_type=task_type)
+    width = plan["encoded_width"]
+    rows = min(plan["row_limit"], plan["read_rows"], plan.get("rows_read", plan["read_rows"]))
+    plan["train_rows"] = _train_rows(rows, task_type, width)
+    plan["expected_train_rows"] = min(plan["train_rows"], plan["total_rows_estimate"])
+    plan["predicted_fit_seconds"] = round(predicted_fit_seconds(task_type, plan["expected_train_rows"], width), 2)
+    return plan
+
+def plan_eda(file_path, sample, total_rows=None):
+    """Choose how many rows eda.py analyses."""
+    info = probe(file_path, sample, total_rows)
+    memory_budget = available_memory_bytes() * MEMORY_FRACTION
+    # Raw frame, cleaned copy and the numeric view for correlations
+    memory_rows = int(memory_budget / (info["bytes_per_raw_row"] * 3 + info["columns"] * 8))
+    time_rows = int(EDA_TIME_BUDGET_SECONDS / (EDA_SECONDS_PER_CELL * max(info["columns"], 1)))
+
+    info.update({
+        "eda_rows": _row_cap(info, min(memory_rows, max(time_rows, MIN_EDA_ROWS))),
+        "memory_budget_mb": round(memory_budget / 1024 ** 2, 1),
+        "time_budget_seconds": EDA_TIME_BUDGET_SECONDS
+    })
+    return info
+
+def plan_metadata(file_path, sample, total_rows=None):
+    """Choose the preview size and the chunk size for the full-file scan in get_metadata.py."""
+    info = probe(file_path, sample, total_rows)
+    chunk_budget = available_memory_bytes() * MEMORY_FRACTION * CHUNK_MEMORY_SHARE
+    # The chunk plus its isnull() mask
+    chunk_rows = int(chunk_budget / (info["bytes_per_raw_row"] + info["columns"]))
+
+    info.update({
+        "preview_rows": max(1, min(PREVIEW_MAX_ROWS, PREVIEW_MAX_CELLS // max(info["columns"], 1))),
+        "chunk_rows": max(1000, chunk_rows)
+    })
+    return info
+
+def is_snapshot(file_path):
+    """
+    Pickled DataFrame written by the dataset session cache (see dataset_cache.py).
+    Only files inside SPILL_DIR count: unpickling runs code, so a path or URL sent by a
+    client is always read as CSV.
+    """
+    if not isinstance(file_path, str) or not file_path.endswith(".pkl") or "://" in file_path:
+        return False
+    spill_dir = os.path.realpath(SPILL_DIR)
+    try:
+        return os.path.commonpath([os.path.realpath(file_path), spill_dir]) == spill_dir
+    except ValueError:
+        # Different drives on Windows
+        return False
+
+def frame_probe(df):
+    """read_probe() for a DataFrame already in memory."""
+    return restore_dtypes(df.head(PROBE_ROWS)), len(df)
+
+def read_probe(file_path):
+    """The probe sample plans are made from, and the exact row count when it is known."""
+    if is_snapshot(file_path):
+        return frame_probe(pd.read_pickle(file_path))
+    return pd.read_csv(file_path, nrows=PROBE_ROWS), None
+
+def plan_frame(df, plan_fn, rows_key, **plan_kwargs):
+    """read_planned() for a DataFrame already in memory: plan from its head, return the planned rows."""
+    plan = plan_fn(None, restore_dtypes(df.head(PROBE_ROWS)), total_rows=len(df), **plan_kwargs)
+    plan["rows_read"] = min(len(df), plan[rows_key])
+    return restore_dtypes(df.head(plan[rows_key])), plan
+
+def read_planned(file_path, plan_fn, rows_key, **plan_kwargs):
+    """
+    Read a CSV in one pass: the first chunk is the probe sample the plan is made from,
+    then reading continues until the planned row count or the end of the file is reached.
+    The plan records the rows actually read, and the exact row count once the file ended.
+    Also accepts an in-memory DataFrame or a session snapshot (.pkl).
+    Returns (df, plan).
+    """
+    if isinstance(file_path, pd.DataFrame):
+        return plan_frame(file_path, plan_fn, rows_key, **plan_kwargs)
+    if is_snapshot(file_path):
+        return plan_frame(pd.read_pickle(file_path), plan_fn, rows_key, **plan_kwargs)
+
+    reader = pd.read_csv(file_path, chunksize=PROBE_ROWS)
+    try:
+        first = next(reader)
+    except StopIteration:
+        return pd.read_csv(file_path), plan_fn(file_path, pd.DataFrame(), **plan_kwargs)
+
+    plan = plan_fn(file_path, first, **plan_kwargs)
+    target_rows = plan[rows_key]
+
+    chunks, n_rows, at_end = [first], len(first), len(first) < PROBE_ROWS
+    if n_rows < target_rows and not at_end:
+        # Remaining chunks can be larger now that the per-row size is known
+        reader.chunksize = max(PROBE_ROWS, min(target_rows - n_rows, 100000))
+        for chunk in reader:
+            chunks.append(chunk)
+            n_rows += len(chunk)
+            if n_rows >= target_rows:
+                break
+        else:
+            at_end = True
+    reader.close()
+
+    df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else first
+    df = df.head(target_rows)
+    if at_end:
+        plan.update(total_rows_estimate=n_rows, total_rows_known=True)
+    plan["rows_read"] = len(df)
+    return df, plan
@@ -5,7 +5,19 @@ import pandas as pd
 import numpy as np
 import requests
 import os
+import io
+import shutil
 import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from serialize import emit, OUTPUT_FORMATS
+from resources import cpu_count
+from scheduler import cpu_lease
+
+# Batch files smaller than this are scored in-process; pool startup would dominate
+PARALLEL_MIN_BYTES = 8 * 1024 ** 2
+# Shards per worker, so a slow shard does not leave the other cores idle
+SHARDS_PER_WORKER = 2
 
 class NpEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -17,36 +29,180 @@ class NpEncoder(json.JSONEncoder):
             return obj.tolist()
         return super(NpEncoder, self).default(obj)
 
-def predict(model_url, input_data=None, input_file=None):
-    try:
-        # 1. Download Model
-        # 1. Download Model
-        # Check if model_url is a local path or URL
-        if os.path.exists(model_url):
-             tmp_path = model_url
+def fetch_artifact(model_url):
+    """Resolve a model path or URL to a local file. Returns (path, is_temp)."""
+    # Check if model_url is a local path or URL
+    if os.path.exists(model_url):
+         tmp_path = model_url
+         is_temp = False
+    elif model_url.startswith("http"):
+        response = requests.get(model_url)
+        if response.status_code != 200:
+            raise Exception(f"Failed to download model: {response.status_code}")
+        
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".pkl") as tmp:
+            tmp.write(response.content)
+            tmp_path = tmp.name
+        is_temp = True
+    else:
+        # It's a string but not a file and not http? Maybe a windows path that os.path.exists failed on?
+        # Try to see if it's a path with quotes or something
+        if os.path.exists(model_url.strip('"').strip("'")):
+             tmp_path = model_url.strip('"').strip("'")
              is_temp = False
-        elif model_url.startswith("http"):
-            response = requests.get(model_url)
-            if response.status_code != 200:
-                raise Exception(f"Failed to download model: {response.status_code}")
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pkl") as tmp:
-                tmp.write(response.content)
-                tmp_path = tmp.name
-            is_temp = True
         else:
-            # It's a string but not a file and not http? Maybe a windows path that os.path.exists failed on?
-            # Try to see if it's a path with quotes or something
-            if os.path.exists(model_url.strip('"').strip("'")):
-                 tmp_path = model_url.strip('"').strip("'")
-                 is_temp = False
-            else:
-                 raise Exception(f"Invalid model path or URL: {model_url}. If you are running the backend on a remote server (e.g. Render) and trained the model locally, the server cannot access your local file path. Please train the model on the server or use a public URL.")
+             raise Exception(f"Invalid model path or URL: {model_url}. If you are running the backend on a remote server (e.g. Render) and trained the model locally, the server cannot access your local file path. Please train the model on the server or use a public URL.")
+
+    return tmp_path, is_temp
+
+def load_artifact(model_url):
+    """Load a trained artifact from a local path or a URL."""
+    tmp_path, is_temp = fetch_artifact(model_url)
+
+    # 2. Load Model
+    artifact = joblib.load(tmp_path)
+    if is_temp:
+        os.unlink(tmp_path) # Cleanup
+    return artifact
+
+def shard_ranges(file_path, n_shards):
+    """
+    Split a CSV into byte ranges that start and end on line boundaries.
+    Returns (header_bytes, [(start, end), ...]).
+    Note: quoted fields containing newlines can be cut; the shard then fails to parse
+    and predict() falls back to scoring the file in one process.
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        header = f.readline()
+        boundaries = [len(header)]
+        for i in range(1, n_shards):
+            f.seek(max(size * i // n_shards, boundaries[-1]))
+            f.readline()  # move to the start of the next line
+            position = f.tell()
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+        boundaries.append(size)
+    return header, [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+# Per-worker artifact, loaded once by the pool initializer
+_worker_artifact = None
+
+def _init_worker(artifact_path):
+    global _worker_artifact
+    # mmap_mode shares large arrays (e.g. KNN training data) between workers through the page cache
+    _worker_artifact = joblib.load(artifact_path, mmap_mode="r")
+    # Parallelism comes from the pool; keep each estimator single-threaded
+    model = _worker_artifact["model"]
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=1)
+
+def _categorical_columns(preprocessor):
+    column_transformer = preprocessor.named_steps['preprocessor']
+    return [col for name, _, cols in column_transformer.transformers_ if name == 'cat' for col in cols]
+
+def _data_lines(body):
+    """Data lines of a CSV body, without line endings; blank lines are skipped like pd.read_csv does."""
+    return [line.rstrip(b"\r") for line in body.split(b"\n") if line.strip()]
 
-        # 2. Load Model
-        artifact = joblib.load(tmp_path)
+def write_predictions(lines, prediction, out):
+    """
+    Write the input lines unchanged with the prediction appended as the last column.
+    Re-serializing the parsed frame would reformat passthrough values (e.g. an int column
+    with missing values becomes float), and differently per shard.
+    """
+    values = pd.Series(prediction).to_csv(index=False, header=False, lineterminator="\n").encode().split(b"\n")
+    for line, value in zip(lines, values):
+        out.write(line + b"," + value + b"\n")
+
+def _score_shard(task):
+    """Score one byte range of the input file and write it (without header) to out_path."""
+    input_file, header, start, end, out_path = task
+    with open(input_file, "rb") as f:
+        f.seek(start)
+        body = f.read(end - start)
+
+    # Shards are parsed separately, so pin categorical columns to str: a shard holding only
+    # numeric-looking values would otherwise be parsed as numbers and miss the one-hot vocabulary
+    preprocessor = _worker_artifact["preprocessor"]
+    df = pd.read_csv(io.BytesIO(header + body), dtype={col: str for col in _categorical_columns(preprocessor)})
+
+    prediction = _worker_artifact["model"].predict(preprocessor.transform(df))
+    target_encoder = _worker_artifact.get("target_encoder")
+    if target_encoder:
+        try:
+            prediction = target_encoder.inverse_transform(prediction)
+        except Exception:
+            pass
+
+    lines = _data_lines(body)
+    if len(lines) != len(df):
+        # Quoted fields spanning lines: let predict() score the file in one process
+        raise ValueError("Shard lines do not match its parsed rows")
+    with open(out_path, "wb") as out:
+        write_predictions(lines, prediction, out)
+    return len(df)
+
+def predict_file_parallel(model_url, input_file, workers):
+    """
+    Score a large CSV on several cores: the file is split into line-aligned byte ranges,
+    shards are scored in a process pool (artifact loaded once per worker, memory-mapped),
+    and the shard outputs are concatenated in input order.
+    """
+    artifact_path, is_temp = fetch_artifact(model_url)
+    shard_dir = tempfile.mkdtemp(prefix="predict_shards_")
+    try:
+        task_type = joblib.load(artifact_path, mmap_mode="r").get("task_type", "Unknown")
+        header, ranges = shard_ranges(input_file, workers * SHARDS_PER_WORKER)
+        tasks = [
+            (input_file, header, start, end, os.path.join(shard_dir, f"shard_{i:05d}.csv"))
+            for i, (start, end) in enumerate(ranges)
+        ]
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(artifact_path,)) as pool:
+            row_counts = list(pool.map(_score_shard, tasks))
+
+        # Merge in input order under a single header
+        output_filename = input_file.replace('.csv', '_predictions.csv')
+        with open(output_filename, "wb") as out:
+            out.write(header.rstrip(b"\r\n") + b",Prediction\n")
+            for task in tasks:
+                with open(task[4], "rb") as shard:
+                    shutil.copyfileobj(shard, out)
+    finally:
+        shutil.rmtree(shard_dir, ignore_errors=True)
         if is_temp:
-            os.unlink(tmp_path) # Cleanup
+            os.unlink(artifact_path)
+
+    result = {
+        "task_type": task_type,
+        "csv_path": os.path.abspath(output_filename),
+        "rows": int(sum(row_counts)),
+        "workers": workers,
+        "shards": len(tasks)
+    }
+    # Also return first 50 rows for preview
+    return result, pd.read_csv(output_filename, nrows=50)
+
+def predict(model_url, input_data=None, input_file=None, output_format='json', workers=0):
+    try:
+        # Large batch files are scored on the CPUs the scheduler's ledger has free
+        # (workers <= 0 means up to one per CPU), so concurrent requests and training jobs share them
+        if input_file and os.path.getsize(input_file) >= PARALLEL_MIN_BYTES:
+            with cpu_lease(workers if workers > 0 else cpu_count()) as allotted:
+                if allotted > 1:
+                    try:
+                        result, preview_df = predict_file_parallel(model_url, input_file, allotted)
+                        emit(result, {"preview": preview_df}, output_format, cls=NpEncoder)
+                        return
+                    except Exception as e:
+                        # Fall back to scoring in one process (e.g. quoted newlines cut by sharding)
+                        print(f"Parallel scoring failed, falling back to a single process: {e}", flush=True)
+
+        # 1. Download and load Model
+        artifact = load_artifact(model_url)
         
         model = artifact["model"]
         preprocessor = artifact["preprocessor"]
@@ -90,24 +246,33 @@ def predict(model_url, input_data=None, input_file=None):
         result = {
             "task_type": task_type
         }
+        frames = {}
 
         if input_file:
             # Add prediction to dataframe
             df['Prediction'] = prediction
             
-            # Save to new CSV
+            # Save to new CSV: input lines as they are, prediction appended (same as the parallel path)
             output_filename = input_file.replace('.csv', '_predictions.csv')
-            df.to_csv(output_filename, index=False)
+            with open(input_file, "rb") as f:
+                header = f.readline()
+                lines = _data_lines(f.read())
+            if len(lines) == len(df):
+                with open(output_filename, "wb") as out:
+                    out.write(header.rstrip(b"\r\n") + b",Prediction\n")
+                    write_predictions(lines, prediction, out)
+            else:
+                # Quoted fields spanning lines
+                df.to_csv(output_filename, index=False)
             
             result["csv_path"] = os.path.abspath(output_filename)
             # Also return first 50 rows for preview
-            # Replace NaN with None for JSON compatibility
-            preview_df = df.head(50).replace({float('nan'): None})
-            result["preview"] = preview_df.to_dict(orient='records')
+            # (NaN is replaced with None for JSON compatibility by emit)
+            frames["preview"] = df.head(50)
         else:
-            result["prediction"] = prediction.tolist()
+            frames["prediction"] = pd.Series(prediction, name="prediction")
         
-        print(json.dumps(result, cls=NpEncoder))
+        emit(result, frames, output_format, cls=NpEncoder)
 
     except Exception as e:
         import traceback
@@ -118,6 +283,8 @@ if __name__ == "__main__":
     parser.add_argument("--model", required=True, help="URL of the model file")
     parser.add_argument("--input", required=False, help="Input data as JSON string")
     parser.add_argument("--input_file", required=False, help="Path to input CSV file")
+    parser.add_argument("--format", required=False, default="json", choices=OUTPUT_FORMATS, help="Output encoding (json, columnar or ndjson)")
+    parser.add_argument("--workers", required=False, type=int, default=0, help="Upper bound on processes for batch scoring (default: the CPUs free in the scheduler ledger)")
     args = parser.parse_args()
     
-    predict(args.model, args.input, args.input_file)
+    predict(args.model, args.input, args.input_file, args.format, args.workers)
@@ -0,0 +1,46 @@
+import os
+import tempfile
+
+# Fraction of total RAM that jobs may reserve together. The rest is left for
+# the Node server, the OS and estimation error.
+MEMORY_FRACTION = float(os.environ.get("AUTOML_MEMORY_FRACTION", 0.8))
+# Local state shared across runs (feature scores, fit timings)
+CACHE_DIR = os.environ.get("AUTOML_CACHE_DIR", os.path.join(tempfile.gettempdir(), "automl_cache"))
+
+def _meminfo():
+    """Parse /proc/meminfo into bytes. Empty on platforms without it."""
+    info = {}
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                info[key] = int(value.strip().split()[0]) * 1024
+    except (OSError, ValueError):
+        pass
+    return info
+
+def total_memory_bytes():
+    info = _meminfo()
+    if "MemTotal" in info:
+        return info["MemTotal"]
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        # Unknown platform: assume a small 2GB machine
+        return 2 * 1024 ** 3
+
+def available_memory_bytes():
+    info = _meminfo()
+    if "MemAvailable" in info:
+        return info["MemAvailable"]
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return total_memory_bytes() // 2
+
+def cpu_count():
+    """CPUs this process may run on (respects affinity/cgroup pinning where available)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
@@ -0,0 +1,304 @@
+import warnings
+import pandas as pd
+import numpy as np
+import argparse
+import json
+import joblib
+import os
+import tempfile
+from sklearn.metrics import r2_score, accuracy_score
+
+from train import train_models, build_feature_stats, artifact_filename, NpEncoder
+from predict import load_artifact
+
+# Filter warnings
+warnings.filterwarnings("ignore", category=UserWarning, module="sklearn")
+
+# Estimators that can be grown on new rows without refitting from scratch.
+# XGBoost continues boosting from the stored booster, sklearn ensembles add
+# trees/stages through warm_start.
+WARM_START_ENSEMBLES = (
+    "RandomForestRegressor", "RandomForestClassifier",
+    "GradientBoostingRegressor", "GradientBoostingClassifier"
+)
+XGBOOST_MODELS = ("XGBRegressor", "XGBClassifier")
+
+# Share of the new rows held out to score the model before and after the update
+HOLDOUT_FRACTION = 0.2
+MIN_HOLDOUT_ROWS = 20
+
+def get_fitted_transformers(full_pipeline):
+    """Return {name: (transformer, columns)} for the fitted ColumnTransformer steps that have columns."""
+    column_transformer = full_pipeline.named_steps['preprocessor']
+    return {
+        name: (trans, list(cols))
+        for name, trans, cols in column_transformer.transformers_
+        if name in ('num', 'cat') and len(cols) > 0
+    }
+
+def compute_drift(X_new, feature_stats, transformers):
+    """
+    Per-column drift of the new rows against the training statistics.
+    Numeric: mean shift in training standard deviations, and missing-rate change.
+    Categorical: share of values outside the fitted vocabulary, and missing-rate change.
+    """
+    drift = {}
+    for col, stats in feature_stats["numeric"].items():
+        values = pd.to_numeric(X_new[col], errors='coerce')
+        scale = stats["std"] if stats["std"] > 0 else 1.0
+        mean_shift = abs(values.mean() - stats["mean"]) / scale if values.notna().any() else 0.0
+        missing_shift = abs(values.isna().mean() - stats["missing_rate"])
+        drift[col] = float(max(mean_shift, missing_shift))
+
+    if 'cat' in transformers:
+        cat_pipeline, cat_cols = transformers['cat']
+        encoder = cat_pipeline.named_steps['encoder']
+        for col, categories in zip(cat_cols, encoder.categories_):
+            values = X_new[col].dropna()
+            unseen_rate = (~values.isin(categories)).mean() if len(values) else 0.0
+            missing_shift = abs(X_new[col].isna().mean() - feature_stats["categorical"][col]["missing_rate"])
+            drift[col] = float(max(unseen_rate, missing_shift))
+
+    return drift
+
+def update_feature_stats(X_new, feature_stats):
+    """
+    Fold the new rows into the stored feature statistics used for drift checks.
+    The fitted imputers, scaler and one-hot vocabulary are left untouched: the stored
+    trees were split on the current encoding, and shifting it would move every
+    threshold. Preprocessing is only refit on the full-refit path.
+    """
+    new_stats = build_feature_stats(X_new, list(feature_stats["numeric"]), list(feature_stats["categorical"]))
+
+    for col, old in feature_stats["numeric"].items():
+        new = new_stats["numeric"][col]
+        total = old["count"] + new["count"]
+        if total == 0 or new["count"] == 0:
+            continue
+        # Combine means and variances of the two samples (parallel algorithm)
+        mean = (old["mean"] * old["count"] + new["mean"] * new["count"]) / total
+        delta = new["mean"] - old["mean"]
+        m2 = old["std"] ** 2 * old["count"] + new["std"] ** 2 * new["count"] + delta ** 2 * old["count"] * new["count"] / total
+        old.update({"count": total, "mean": mean, "std": float(np.sqrt(m2 / total))})
+
+    for col, old in feature_stats["categorical"].items():
+        counts = old["counts"]
+        for value, count in new_stats["categorical"][col]["counts"].items():
+            counts[value] = counts.get(value, 0) + count
+
+    n_old, n_new = feature_stats["n_rows"], new_stats["n_rows"]
+    for col in feature_stats["numeric"]:
+        old = feature_stats["numeric"][col]
+        old["missing_rate"] = (old["missing_rate"] * n_old + new_stats["numeric"][col]["missing_rate"] * n_new) / (n_old + n_new)
+    for col in feature_stats["categorical"]:
+        old = feature_stats["categorical"][col]
+        old["missing_rate"] = (old["missing_rate"] * n_old + new_stats["categorical"][col]["missing_rate"] * n_new) / (n_old + n_new)
+    feature_stats["n_rows"] = n_old + n_new
+
+    return feature_stats
+
+def warm_start_model(model, X_t, y, n_old_rows):
+    """
+    Grow the stored model on the new rows. Returns the number of trees/rounds added.
+    The number of added estimators is proportional to the share of new rows.
+    """
+    model_type = type(model).__name__
+    n_estimators = model.get_params()["n_estimators"]
+    added = int(np.clip(round(n_estimators * len(y) / max(n_old_rows, 1)), 5, n_estimators))
+
+    if model_type in XGBOOST_MODELS:
+        # Continued boosting: adds `added` rounds on top of the existing booster
+        booster = model.get_booster()
+        model.set_params(n_estimators=added)
+        model.fit(X_t, y, xgb_model=booster)
+        model.set_params(n_estimators=n_estimators + added)
+    else:
+        model.set_params(warm_start=True, n_estimators=n_estimators + added)
+        model.fit(X_t, y)
+        model.set_params(warm_start=False)
+
+    return added
+
+def holdout_mask(y, task_type):
+    """
+    Rows of the new data kept out of the update to score it. None are held out when there
+    are too few rows, or when the remaining rows would miss a class of the stored model.
+    """
+    n_rows = len(y)
+    n_holdout = int(n_rows * HOLDOUT_FRACTION)
+    mask = np.zeros(n_rows, dtype=bool)
+    if n_holdout < MIN_HOLDOUT_ROWS:
+        return mask
+    mask[np.random.RandomState(42).choice(n_rows, n_holdout, replace=False)] = True
+    if task_type == "Classification" and len(np.unique(y[~mask])) != len(np.unique(y)):
+        mask[:] = False
+    return mask
+
+def score_model(model, X_t, y, task_type):
+    y_pred = model.predict(X_t)
+    return r2_score(y, y_pred) if task_type == "Regression" else accuracy_score(y, y_pred)
+
+def available_base_file(base_file, artifact):
+    """Base data for a full refit: --base_file, else the training data the artifact was trained on."""
+    base_file = base_file or (artifact or {}).get("training_file")
+    if base_file and (base_file.startswith("http") or os.path.exists(base_file)):
+        return base_file
+    return None
+
+def full_refit(file_path, target_column, base_file, reason, n_jobs=1, job_id=None):
+    """
+    Retrain from scratch on the base data plus the new rows. Without base data there is no
+    refit: a model trained on a small batch alone (possibly missing classes) would replace
+    the stored one, so the caller gets refit_required and the existing artifact is kept.
+    """
+    if not base_file:
+        return {
+            "error": f"A full refit is required ({reason}) but no base data is available. "
+                     "Pass the original training data as base file; the existing model was kept.",
+            "refit_required": True,
+            "refit_reason": reason
+        }
+
+    combined = pd.concat([pd.read_csv(base_file), pd.read_csv(file_path)], ignore_index=True)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp:
+        tmp_path = tmp.name
+    combined.to_csv(tmp_path, index=False)
+    try:
+        result = train_models(tmp_path, target_column, n_jobs, job_id=job_id)
+    finally:
+        os.unlink(tmp_path)
+
+    if "error" not in result:
+        result["update_mode"] = "full_refit"
+        result["refit_reason"] = reason
+    return result
+
+def retrain_model(model_url, file_path, target_column=None, base_file=None, drift_threshold=0.3, n_jobs=1, job_id=None):
+    """
+    Update a stored model with new rows. Writes its artifacts to the working directory,
+    which is the job workspace when run through scheduler.py.
+    """
+    artifact = None
+
+    def refit(reason):
+        return full_refit(file_path, target_column, available_base_file(base_file, artifact), reason, n_jobs, job_id)
+
+    try:
+        artifact = load_artifact(model_url)
+        model = artifact["model"]
+        full_pipeline = artifact["preprocessor"]
+        task_type = artifact.get("task_type", "Unknown")
+        target_encoder = artifact.get("target_encoder")
+        feature_stats = artifact.get("feature_stats")
+        target_column = target_column or artifact.get("target_column")
+
+        if not target_column:
+            raise Exception("Target column is required for artifacts trained before incremental updates were supported.")
+
+        # Artifacts from older training runs carry no statistics to update incrementally
+        if feature_stats is None:
+            return refit("Artifact has no stored feature statistics.")
+
+        df = pd.read_csv(file_path)
+        if target_column not in df.columns:
+            raise Exception(f"Target column '{target_column}' not found in new data.")
+        df = df.dropna(subset=[target_column])
+        if df.empty:
+            raise Exception("No labelled rows found in new data.")
+
+        X_new = df.drop(columns=[target_column])
+        y_new = df[target_column]
+
+        transformers = get_fitted_transformers(full_pipeline)
+        missing_cols = [col for _, cols in transformers.values() for col in cols if col not in X_new.columns]
+        if missing_cols:
+            raise Exception(f"New data is missing training columns: {missing_cols}")
+
+        # Encode target the same way train.py did
+        if task_type == "Regression":
+            y_new = pd.to_numeric(y_new, errors='coerce')
+            valid = y_new.notna()
+            X_new, y_new = X_new.loc[valid], y_new[valid]
+        else:
+            # Numeric low-cardinality targets were encoded from their numeric values
+            if np.issubdtype(target_encoder.classes_.dtype, np.number):
+                y_new = pd.to_numeric(y_new, errors='coerce')
+                valid = y_new.notna()
+                X_new, y_new = X_new.loc[valid], y_new[valid]
+            unseen = set(pd.unique(y_new)) - set(target_encoder.classes_)
+            if unseen:
+                return refit(f"New target classes found: {sorted(map(str, unseen))}")
+            y_new = target_encoder.transform(y_new)
+
+        # 1. Drift check
+        drift = compute_drift(X_new, feature_stats, transformers)
+        max_drift = max(drift.values()) if drift else 0.0
+        if max_drift > drift_threshold:
+            worst = max(drift, key=drift.get)
+            return refit(f"Drift {max_drift:.2f} in '{worst}' exceeds threshold {drift_threshold}.")
+
+        model_type = type(model).__name__
+        if model_type not in WARM_START_ENSEMBLES + XGBOOST_MODELS:
+            return refit(f"{model_type} does not support incremental updates.")
+
+        # Warm-started classifiers must see the same class set as the stored model
+        if task_type == "Classification" and len(np.unique(y_new)) != len(target_encoder.classes_):
+            return refit("New rows do not cover every target class.")
+
+        # Hold out a slice of the new rows, so the reported scores are not training accuracy
+        y_new = np.asarray(y_new)
+        holdout = holdout_mask(y_new, task_type)
+        X_t = full_pipeline.transform(X_new)
+        X_fit, y_fit = X_t[~holdout], y_new[~holdout]
+        score_before = score_model(model, X_t[holdout], y_new[holdout], task_type) if holdout.any() else None
+
+        # 2. Update the drift statistics (preprocessing stays frozen), then 3. grow the model
+        n_old_rows = feature_stats["n_rows"]
+        feature_stats = update_feature_stats(X_new, feature_stats)
+        estimators_added = warm_start_model(model, X_fit, y_fit, n_old_rows)
+        score_after = score_model(model, X_t[holdout], y_new[holdout], task_type) if holdout.any() else None
+
+        # 4. Save updated artifact (same layout as train.py)
+        model_name = artifact.get("model_name", model_type)
+        model_filename = artifact_filename(task_type, model_name, job_id)
+        artifact.update({
+            "model": model,
+            "preprocessor": full_pipeline,
+            "feature_stats": feature_stats,
+            "version": artifact.get("version", 1) + 1
+        })
+        joblib.dump(full_pipeline, "preprocessor.pkl")
+        joblib.dump(artifact, model_filename)
+
+        return {
+            "task_type": task_type,
+            "best_model": model_name,
+            "update_mode": "incremental",
+            "rows_added": int(len(y_fit)),
+            "estimators_added": estimators_added,
+            "rows_held_out": int(holdout.sum()),
+            # Both scored on the held-out rows; None when too few rows to hold any out
+            "score_before_update": score_before,
+            "score_after_update": score_after,
+            "max_drift": max_drift,
+            "drift": drift,
+            "version": artifact["version"],
+            "model_path": os.path.abspath(model_filename)
+        }
+
+    except Exception as e:
+        return {"error": str(e)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", required=True, help="Path or URL of the existing model artifact")
+    parser.add_argument("--file", required=True, help="Path or URL to the CSV file with new rows")
+    parser.add_argument("--target", required=False, help="Target column name (defaults to the one stored in the artifact)")
+    parser.add_argument("--base_file", required=False, help="Original training CSV, used when a full refit is needed")
+    parser.add_argument("--drift_threshold", required=False, type=float, default=0.3, help="Drift score above which the model is refit from scratch")
+    parser.add_argument("--n_jobs", type=int, default=1, help="CPU cores a full refit may use (allotted by scheduler.py)")
+    parser.add_argument("--job_id", required=False, help="Job id, used to name the artifact (random if omitted)")
+    args = parser.parse_args()
+
+    result = retrain_model(args.model, args.file, args.target, args.base_file, args.drift_threshold, args.n_jobs, args.job_id)
+    print(json.dumps(result, cls=NpEncoder))
@@ -0,0 +1,339 @@
+import argparse
+import json
+import math
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+
+from resources import total_memory_bytes, available_memory_bytes, cpu_count, MEMORY_FRACTION
+from planner import plan_training, read_probe, MATRIX_COPIES
+
+try:
+    import fcntl
+
+    def _lock(f):
+        fcntl.flock(f, fcntl.LOCK_EX)
+
+    def _unlock(f):
+        fcntl.flock(f, fcntl.LOCK_UN)
+except ImportError:
+    # Windows
+    import msvcrt
+
+    def _lock(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+# All scheduler processes share one ledger of queued/running jobs, guarded by a file lock.
+# Every job (training or retraining) runs inside its own workspace so preprocessor.pkl /
+# best_model_*.pkl never collide.
+JOB_DIR = os.environ.get("AUTOML_JOB_DIR", os.path.join(tempfile.gettempdir(), "automl_jobs"))
+LEDGER_PATH = os.path.join(JOB_DIR, "jobs.json")
+LOCK_PATH = os.path.join(JOB_DIR, "jobs.lock")
+WORKSPACE_DIR = os.path.join(JOB_DIR, "workspaces")
+TRAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "train.py")
+RETRAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "retrain.py")
+POLL_SECONDS = 1.0
+
+# Interpreter + sklearn/xgboost baseline of one train.py run
+BASE_PROCESS_BYTES = 300 * 1024 ** 2
+
+def estimate_job_memory(file_path, probe=None):
+    """
+    Memory of one train.py run, from the same plan train.py will use.
+    probe is (sample, total_rows) when the caller already holds the data (see planner.frame_probe).
+    """
+    sample, total_rows = probe or read_probe(file_path)
+    plan = plan_training(file_path, sample, total_rows=total_rows)
+    matrix_bytes = plan["expected_train_rows"] * plan["bytes_per_encoded_row"] * MATRIX_COPIES
+    raw_bytes = plan["expected_read_rows"] * plan["bytes_per_raw_row"]
+    return int(BASE_PROCESS_BYTES + matrix_bytes + raw_bytes)
+
+@contextmanager
+def ledger():
+    """Locked read-modify-write access to the job ledger."""
+    os.makedirs(JOB_DIR, exist_ok=True)
+    with open(LOCK_PATH, "a+") as lock:
+        _lock(lock)
+        try:
+            try:
+                with open(LEDGER_PATH) as f:
+                    jobs = json.load(f)
+            except (OSError, ValueError):
+                jobs = {}
+            yield jobs
+            tmp_path = LEDGER_PATH + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(jobs, f)
+            os.replace(tmp_path, LEDGER_PATH)
+        finally:
+            _unlock(lock)
+
+def _pid_alive(pid):
+    if os.name == "nt":
+        # os.kill(pid, 0) would terminate the process on Windows
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _prune(jobs):
+    """Drop jobs whose scheduler process died without cleaning up."""
+    for job_id in [j for j, job in jobs.items() if not _pid_alive(job["owner_pid"])]:
+        jobs.pop(job_id)
+
+def _queue_order(jobs):
+    queued = [job for job in jobs.values() if job["status"] == "queued"]
+    return sorted(queued, key=lambda job: (-job["priority"], job["submitted_at"]))
+
+def _try_admit(jobs, job_id, max_cpus=None):
+    """
+    Admit the job if it is at the head of the queue and fits the free memory and CPUs.
+    A job larger than the whole budget is still admitted, but only onto an idle machine.
+    """
+    queue = _queue_order(jobs)
+    if not queue or queue[0]["id"] != job_id:
+        return False
+
+    job = jobs[job_id]
+    running = [j for j in jobs.values() if j["status"] == "running"]
+    total_cpus = cpu_count()
+    used_cpus = sum(j["cpus"] for j in running)
+
+    if running:
+        reserved = sum(j["memory_bytes"] for j in running)
+        budget = total_memory_bytes() * MEMORY_FRACTION - reserved
+        if job["memory_bytes"] > budget or job["memory_bytes"] > available_memory_bytes():
+            return False
+        if used_cpus >= total_cpus:
+            return False
+
+    # Fair share of the CPUs between this job, the running ones and the ones still waiting
+    share = math.ceil(total_cpus / (len(running) + len(queue)))
+    job["cpus"] = max(1, min(share, total_cpus - used_cpus, max_cpus or total_cpus))
+    job["status"] = "running"
+    job["started_at"] = time.time()
+    return True
+
+def _run_script(job_id, workspace, command, cpus):
+    """Run a train.py / retrain.py command in the job workspace, forwarding progress lines."""
+    # Limit BLAS/OpenMP threads to the allotment as well, not only n_jobs
+    env = dict(os.environ)
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        env[var] = str(cpus)
+
+    proc = subprocess.Popen(
+        [sys.executable] + command + ["--n_jobs", str(cpus), "--job_id", job_id],
+        cwd=workspace, stdout=subprocess.PIPE, text=True, env=env
+    )
+    with ledger() as jobs:
+        job = jobs.get(job_id)
+        if job is None or job["status"] == "cancelled":
+            proc.terminate()
+        else:
+            job["child_pid"] = proc.pid
+
+    last_json = None
+    for line in proc.stdout:
+        if line.startswith("PROGRESS:"):
+            print(line, end="", flush=True)
+        elif line.startswith("{"):
+            last_json = line
+    proc.wait()
+
+    if last_json is None:
+        return {"error": f"Training process exited with code {proc.returncode}"}
+    return json.loads(last_json)
+
+def _absolute(path):
+    """The workspace becomes the working directory, so local paths must be absolute."""
+    return os.path.abspath(path) if path and os.path.exists(path) else path
+
+def submit_job(file_path, target_column, priority=0, job_id=None, max_cpus=None, probe=None):
+    """Queue a training job, wait for admission, run it and return train.py's result."""
+    file_path = _absolute(file_path)
+    return _submit(job_id, [TRAIN_SCRIPT, "--file", file_path, "--target", target_column],
+                   [file_path], target_column, priority, max_cpus, {file_path: probe})
+
+def submit_retrain(model_url, file_path, target_column=None, base_file=None, drift_threshold=None,
+                   priority=0, job_id=None, max_cpus=None):
+    """Queue a retrain.py run (incremental update or full refit) like a training job."""
+    file_path, base_file = _absolute(file_path), _absolute(base_file)
+    command = [RETRAIN_SCRIPT, "--model", _absolute(model_url), "--file", file_path]
+    if target_column:
+        command += ["--target", target_column]
+    if base_file:
+        command += ["--base_file", base_file]
+    if drift_threshold is not None:
+        command += ["--drift_threshold", str(drift_threshold)]
+    # A full refit trains on the base data plus the new rows
+    return _submit(job_id, command, [f for f in (file_path, base_file) if f], target_column, priority, max_cpus)
+
+def _submit(job_id, command, data_files, target_column, priority, max_cpus, probes=None):
+    """Queue a job, wait for admission, run command in its workspace and return the script's result."""
+    job_id = job_id or uuid.uuid4().hex[:12]
+    workspace = os.path.join(WORKSPACE_DIR, job_id)
+    probes = probes or {}
+
+    try:
+        memory_bytes = BASE_PROCESS_BYTES + sum(estimate_job_memory(f, probes.get(f)) - BASE_PROCESS_BYTES for f in data_files)
+    except Exception as e:
+        return {"error": f"Could not read dataset: {str(e)}", "job_id": job_id}
+
+    with ledger() as jobs:
+        _prune(jobs)
+        if job_id in jobs:
+            return {"error": f"Job '{job_id}' already exists", "job_id": job_id}
+        jobs[job_id] = {
+            "id": job_id,
+            "status": "queued",
+            "priority": priority,
+            "submitted_at": time.time(),
+            "owner_pid": os.getpid(),
+            "memory_bytes": memory_bytes,
+            "cpus": 0,
+            "target": target_column
+        }
+
+    result = None
+    try:
+        while True:
+            with ledger() as jobs:
+                job = jobs.get(job_id)
+                if job is None or job["status"] == "cancelled":
+                    return {"error": "Job cancelled", "job_id": job_id}
+                _prune(jobs)
+                if _try_admit(jobs, job_id, max_cpus):
+                    cpus = job["cpus"]
+                    break
+            time.sleep(POLL_SECONDS)
+
+        os.makedirs(workspace, exist_ok=True)
+        result = _run_script(job_id, workspace, command, cpus)
+    finally:
+        with ledger() as jobs:
+            job = jobs.pop(job_id, None)
+        cancelled = job is None or job["status"] == "cancelled"
+        if cancelled or result is None or "error" in result:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    if cancelled:
+        return {"error": "Job cancelled", "job_id": job_id}
+
+    result.update({
+        "job_id": job_id,
+        "workspace": workspace,
+        "allocated_cpus": cpus,
+        "estimated_memory_mb": round(memory_bytes / 1024 ** 2, 1)
+    })
+    return result
+
+@contextmanager
+def cpu_lease(max_cpus):
+    """
+    Reserve up to max_cpus of the CPUs not allotted to running jobs, for work outside
+    submit_job (e.g. batch scoring in predict.py). The lease is a running ledger entry,
+    so training admission sees it too. Never waits: at least one CPU is granted.
+    """
+    lease_id = f"lease_{uuid.uuid4().hex[:12]}"
+    with ledger() as jobs:
+        _prune(jobs)
+        used_cpus = sum(j["cpus"] for j in jobs.values() if j["status"] == "running")
+        cpus = max(1, min(max_cpus, cpu_count() - used_cpus))
+        jobs[lease_id] = {
+            "id": lease_id,
+            "status": "running",
+            "kind": "lease",
+            "priority": 0,
+            "submitted_at": time.time(),
+            "started_at": time.time(),
+            "owner_pid": os.getpid(),
+            "memory_bytes": 0,
+            "cpus": cpus
+        }
+    try:
+        yield cpus
+    finally:
+        with ledger() as jobs:
+            jobs.pop(lease_id, None)
+
+def cancel_job(job_id):
+    with ledger() as jobs:
+        job = jobs.get(job_id)
+        if job is None:
+            return {"error": f"Job '{job_id}' not found"}
+        previous = job["status"]
+        job["status"] = "cancelled"
+        if previous == "running" and job.get("child_pid"):
+            try:
+                os.kill(job["child_pid"], signal.SIGTERM)
+            except OSError:
+                pass
+    return {"status": "cancelled", "job_id": job_id, "previous_status": previous}
+
+def job_status():
+    with ledger() as jobs:
+        _prune(jobs)
+        running = [j for j in jobs.values() if j["status"] == "running"]
+        return {
+            "running": running,
+            "queued": _queue_order(jobs),
+            "cpus": cpu_count(),
+            "cpus_in_use": sum(j["cpus"] for j in running),
+            "memory_budget_mb": round(total_memory_bytes() * MEMORY_FRACTION / 1024 ** 2, 1),
+            "memory_reserved_mb": round(sum(j["memory_bytes"] for j in running) / 1024 ** 2, 1),
+            "memory_available_mb": round(available_memory_bytes() / 1024 ** 2, 1)
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    submit_parser = subparsers.add_parser("submit", help="Queue a training job and wait for its result")
+    submit_parser.add_argument("--file", required=True, help="Path or URL to the CSV file")
+    submit_parser.add_argument("--target", required=True, help="Target column name")
+    submit_parser.add_argument("--priority", type=int, default=0, help="Higher priorities are admitted first")
+    submit_parser.add_argument("--job_id", required=False, help="Job id (generated if omitted)")
+    submit_parser.add_argument("--max_cpus", type=int, required=False, help="Upper bound on the CPUs given to this job")
+
+    retrain_parser = subparsers.add_parser("retrain", help="Queue a model update with new rows and wait for its result")
+    retrain_parser.add_argument("--model", required=True, help="Path or URL of the existing model artifact")
+    retrain_parser.add_argument("--file", required=True, help="Path or URL to the CSV file with new rows")
+    retrain_parser.add_argument("--target", required=False, help="Target column name (defaults to the one stored in the artifact)")
+    retrain_parser.add_argument("--base_file", required=False, help="Original training CSV, used when a full refit is needed")
+    retrain_parser.add_argument("--drift_threshold", type=float, required=False, help="Drift score above which the model is refit from scratch")
+    retrain_parser.add_argument("--priority", type=int, default=0, help="Higher priorities are admitted first")
+    retrain_parser.add_argument("--job_id", required=False, help="Job id (generated if omitted)")
+    retrain_parser.add_argument("--max_cpus", type=int, required=False, help="Upper bound on the CPUs given to this job")
+
+    cancel_parser = subparsers.add_parser("cancel", help="Cancel a queued or running job")
+    cancel_parser.add_argument("--job_id", required=True, help="Job id")
+
+    subparsers.add_parser("status", help="Show running and queued jobs")
+
+    args = parser.parse_args()
+
+    if args.command == "submit":
+        result = submit_job(args.file, args.target, args.priority, args.job_id, args.max_cpus)
+    elif args.command == "retrain":
+        result = submit_retrain(args.model, args.file, args.target, args.base_file, args.drift_threshold,
+                                args.priority, args.job_id, args.max_cpus)
+    elif args.command == "cancel":
+        result = cancel_job(args.job_id)
+    else:
+        result = job_status()
+    print(json.dumps(result))
@@ -0,0 +1,82 @@
+import json
+import numpy as np
+import pandas as pd
+
+# Rows per NDJSON "rows" message. Large enough to keep per-line overhead low,
+# small enough that the Node bridge can parse each line as it arrives.
+NDJSON_CHUNK_ROWS = 5000
+
+OUTPUT_FORMATS = ['json', 'columnar', 'ndjson']
+
+def column_values(series):
+    """
+    Column as a JSON-safe list. NaN/Inf/NaT become None in one vectorized step
+    instead of walking every cell.
+    """
+    values = series.to_numpy()
+    kind = values.dtype.kind
+    if kind in 'iub':
+        return values.tolist()
+    if kind == 'f':
+        out = values.astype(object)
+        out[~np.isfinite(values)] = None
+        return out.tolist()
+
+    missing = pd.isna(series).to_numpy()
+    if kind in 'Mm':
+        # Datetimes/timedeltas are not JSON serializable, send them as strings
+        out = series.astype(str).to_numpy(dtype=object)
+    else:
+        out = values.astype(object)
+    out[missing] = None
+    return out.tolist()
+
+def frame_to_columns(df):
+    """Column-oriented table: {"columns": [...], "values": [[col0...], [col1...], ...]}."""
+    return {
+        "columns": [str(col) for col in df.columns],
+        "values": [column_values(df.iloc[:, i]) for i in range(df.shape[1])]
+    }
+
+def frame_to_records(df):
+    """Row-oriented records (same shape as df.to_dict(orient='records')), NaN-safe."""
+    table = frame_to_columns(df)
+    return [dict(zip(table["columns"], row)) for row in zip(*table["values"])]
+
+def _emit_ndjson_frame(key, frame, cls):
+    flat = isinstance(frame, pd.Series)
+    columns = [str(frame.name)] if flat else [str(col) for col in frame.columns]
+    print(json.dumps({"ndjson": "columns", "key": key, "columns": columns, "flat": flat}), flush=True)
+
+    for start in range(0, len(frame), NDJSON_CHUNK_ROWS):
+        chunk = frame.iloc[start:start + NDJSON_CHUNK_ROWS]
+        if flat:
+            rows = column_values(chunk)
+        else:
+            rows = [list(row) for row in zip(*frame_to_columns(chunk)["values"])]
+        print(json.dumps({"ndjson": "rows", "key": key, "rows": rows}, cls=cls), flush=True)
+
+def emit(result, frames=None, fmt='json', cls=None):
+    """
+    Print a script result, attaching DataFrames/Series under their keys.
+    - json:     frames as records, one JSON document (the original output format)
+    - columnar: frames as {"columns", "values"} arrays, one JSON document
+    - ndjson:   frames streamed as "columns"/"rows" lines, then a final "result" line
+    A Series is always sent as a flat list.
+    """
+    frames = frames or {}
+
+    if fmt == 'ndjson':
+        for key, frame in frames.items():
+            _emit_ndjson_frame(key, frame, cls)
+        print(json.dumps({"ndjson": "result", "data": result}, cls=cls), flush=True)
+        return
+
+    for key, frame in frames.items():
+        if isinstance(frame, pd.Series):
+            result[key] = column_values(frame)
+        elif fmt == 'columnar':
+            result[key] = frame_to_columns(frame)
+        else:
+            result[key] = frame_to_records(frame)
+    print(json.dumps(result, cls=cls))
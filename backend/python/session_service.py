@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+from flask import Flask, Response, request
+
+from dataset_cache import DatasetStore, SessionNotFound, compact_frame, restore_dtypes
+from get_metadata import frame_metadata
+from eda import perform_eda
+from impute import impute_frame
+from scheduler import submit_job
+from planner import frame_probe
+from serialize import frame_to_records
+
+# Long-lived dataset session service. The upload -> preview -> EDA -> impute -> train flow
+# parses the CSV once; every step then runs against the cached, compact DataFrame.
+# Started by the Node server (src/utils/sessionService.js); listens on localhost only.
+
+class NpEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, np.integer):
+            return int(obj)
+        if isinstance(obj, np.floating):
+            return float(obj)
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        return super(NpEncoder, self).default(obj)
+
+app = Flask(__name__)
+store = DatasetStore()
+# Training jobs started through the service: job id -> {"status", "result"}.
+# Kept until their finished result has been fetched once.
+jobs = {}
+jobs_lock = threading.Lock()
+
+def _json(result, status=200):
+    return Response(json.dumps(result, cls=NpEncoder), status=status, mimetype="application/json")
+
+def _run(session_id, operation):
+    """
+    Run operation(session, body) on the session, opening it from body["file"] if needed.
+    An operation may return a callable: that long-running part runs after the session is released.
+    Errors the operation reports are 4xx. 503 means the operation never started (e.g. the
+    dataset could not be opened), so the Node server may run the standalone script instead;
+    500 means it failed part way, which is only safe to retry for read-only operations.
+    """
+    body = request.get_json(silent=True) or {}
+    started = False
+    try:
+        with store.use(session_id, body.get("file")) as session:
+            started = True
+            result = operation(session, body)
+            session_info = {"session_id": session.id, "version": session.version}
+        if callable(result):
+            result = result()
+        if isinstance(result, dict):
+            result.setdefault("session", session_info)
+        return _json(result, 422 if isinstance(result, dict) and "error" in result else 200)
+    except SessionNotFound as e:
+        return _json({"error": str(e.args[0])}, 404)
+    except Exception as e:
+        return _json({"error": str(e)}, 500 if started else 503)
+
+def _metadata(session, body):
+    metadata, preview = frame_metadata(session.df)
+    metadata["preview"] = frame_to_records(preview)
+    return metadata
+
+def _eda(session, body):
+    return perform_eda(
+        session.df,
+        body.get("target"),
+        bool(body.get("wide", False)),
+        int(body.get("corr_top_k", 100)),
+        float(body.get("corr_threshold", 0.3))
+    )
+
+def _impute(session, body):
+    """Impute in place and record the result as a new version of the session."""
+    df = session.df
+    column = body.get("column")
+    if column and column != "ALL" and column not in df.columns:
+        return {"error": f"Column '{column}' not found"}
+    columns = [column] if column and column != "ALL" else df.columns.tolist()
+    # impute.py works on parsed CSV dtypes; restore the affected categorical columns first
+    categorical = [col for col in columns if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype)]
+    for col in categorical:
+        df[col] = df[col].astype(object)
+
+    result = impute_frame(df, column, body.get("strategy"))
+    compact_frame(df, categorical=[col for col in categorical if df[col].dtype == object])
+    if result.get("imputed_count"):
+        store.commit(session, {"operation": "impute", "column": column or "ALL", "strategy": result["strategy_used"]})
+    return result
+
+def _train(session, body):
+    """
+    Start training on a snapshot of the current version through the job scheduler
+    (admission, CPU share, cancel). Returns at once; the result is polled from /jobs/<job_id>,
+    so no HTTP request has to stay open for the whole queue wait and training run.
+    """
+    target = body.get("target")
+    job_id = body.get("job_id")
+    if not target or not job_id:
+        return {"error": "target and job_id are required"}
+    with jobs_lock:
+        if job_id in jobs:
+            return {"error": f"Job '{job_id}' already exists"}
+        jobs[job_id] = {"status": "running", "result": None}
+
+    snapshot = store.snapshot(session)
+    # The session already holds the frame: the scheduler sizes the job without unpickling the snapshot
+    probe = frame_probe(session.df)
+
+    def run():
+        try:
+            result = submit_job(snapshot, target, int(body.get("priority", 0)), job_id, body.get("max_cpus"), probe)
+        except Exception as e:
+            result = {"error": str(e), "job_id": job_id}
+        finally:
+            store.release_snapshot(session, snapshot)
+        with jobs_lock:
+            jobs[job_id] = {"status": "finished", "result": result}
+
+    threading.Thread(target=run, daemon=True).start()
+    return {"status": "running", "job_id": job_id}
+
+def _export(session, body):
+    """Write the current version to a CSV, e.g. to persist imputed data to storage."""
+    fd, temp_path = tempfile.mkstemp(prefix=f"{session.id}_v{session.version}_", suffix=".csv")
+    os.close(fd)
+    restore_dtypes(session.df).to_csv(temp_path, index=False)
+    return {"temp_path": temp_path, "version": session.version}
+
+OPERATIONS = {
+    "metadata": _metadata,
+    "eda": _eda,
+    "impute": _impute,
+    "train": _train,
+    "export": _export
+}
+
+@app.route("/health")
+def health():
+    return _json({"status": "ok"})
+
+@app.route("/sessions", methods=["GET"])
+def list_sessions():
+    return _json(store.status())
+
+@app.route("/sessions/<session_id>", methods=["PUT"])
+def open_session(session_id):
+    return _run(session_id, lambda session, body: session.info())
+
+@app.route("/sessions/<session_id>", methods=["GET"])
+def get_session(session_id):
+    session = store.sessions.get(session_id)
+    if session is None:
+        return _json({"error": f"Session '{session_id}' not found"}, 404)
+    return _json(session.info())
+
+@app.route("/sessions/<session_id>", methods=["DELETE"])
+def delete_session(session_id):
+    if not store.drop(session_id):
+        return _json({"error": f"Session '{session_id}' not found"}, 404)
+    return _json({"status": "deleted", "session_id": session_id})
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Status of a training job started by the train operation; its result once finished."""
+    with jobs_lock:
+        job = jobs.get(job_id)
+        if job is None:
+            return _json({"error": f"Job '{job_id}' not found"}, 404)
+        if job["status"] != "finished":
+            return _json({"status": job["status"], "job_id": job_id})
+        jobs.pop(job_id)
+    result = job["result"]
+    return _json(result, 422 if "error" in result else 200)
+
+@app.route("/sessions/<session_id>/<operation>", methods=["POST"])
+def run_operation(session_id, operation):
+    if operation not in OPERATIONS:
+        return _json({"error": f"Unknown operation: {operation}. Use one of {list(OPERATIONS)}."}, 404)
+    return _run(session_id, OPERATIONS[operation])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("SESSION_SERVICE_PORT", 5001)), help="Port to listen on")
+    args = parser.parse_args()
+
+    app.run(host=args.host, port=args.port, threaded=True)
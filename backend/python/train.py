@@ -5,11 +5,19 @@ import argparse
 import json
 import joblib
 import os
+import time
+import uuid
 from sklearn.model_selection import train_test_split
 from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error, accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
 
+from serialize import frame_to_records
+from planner import read_planned, plan_training, refine_training_plan, is_snapshot
+from feature_filter import FilterSelector, SCORERS
+from cost_model import FitCostModel, measure_fit, record_timings, class_factor, OVERRUN_FACTOR
+from importance import permutation_importance
+
 # Filter warnings
 warnings.filterwarnings("ignore", category=UserWarning, module="sklearn")
 
@@ -36,22 +44,73 @@ class NpEncoder(json.JSONEncoder):
             return obj.tolist()
         return super(NpEncoder, self).default(obj)
 
-def train_models(file_path, target_column):
+def artifact_filename(task_type, model_name, job_id=None):
+    """
+    Artifact file name, unique per job: it is also the object name in model storage,
+    so two jobs that pick the same best model must not share it.
+    """
+    suffix = job_id or uuid.uuid4().hex[:12]
+    return f"best_model_{task_type}_{model_name.replace(' ', '_')}_{suffix}.pkl"
+
+def training_file_reference(file_path):
+    """Where retrain.py can find the training data again: a URL or an absolute local path."""
+    if not isinstance(file_path, str) or is_snapshot(file_path):
+        return None
+    return os.path.abspath(file_path) if os.path.exists(file_path) else file_path
+
+def build_feature_stats(X, num_cols, cat_cols):
+    """
+    Summary statistics of the training features. Stored in the artifact so that
+    retrain.py can measure drift of new rows and keep the statistics up to date.
+    """
+    stats = {"n_rows": int(len(X)), "numeric": {}, "categorical": {}}
+    for col in num_cols:
+        values = X[col]
+        stats["numeric"][col] = {
+            "count": int(values.notna().sum()),
+            "mean": float(values.mean()) if values.notna().any() else 0.0,
+            "std": float(values.std(ddof=0)) if values.notna().any() else 0.0,
+            "missing_rate": float(values.isna().mean())
+        }
+    for col in cat_cols:
+        stats["categorical"][col] = {
+            "counts": {str(k): int(v) for k, v in X[col].value_counts().items()},
+            "missing_rate": float(X[col].isna().mean())
+        }
+    return stats
+
+def build_models(task_type, n_jobs=1):
+    """Candidate estimators for the task, with their default settings."""
+    if task_type == "Regression":
+        return {
+            "Linear Regression": LinearRegression(),
+            "Ridge Regression": Ridge(),
+            "Lasso Regression": Lasso(),
+            "Random Forest Regressor": RandomForestRegressor(n_estimators=50, max_depth=10, n_jobs=n_jobs, random_state=42),
+            "Gradient Boosting Regressor": GradientBoostingRegressor(n_estimators=50, max_depth=5, random_state=42),
+            "XGBoost Regressor": XGBRegressor(n_estimators=50, max_depth=6, n_jobs=n_jobs, random_state=42),
+            "Support Vector Regressor (SVR)": SVR(kernel='rbf', max_iter=2000)
+        }
+    return {
+        "Logistic Regression": LogisticRegression(max_iter=500, n_jobs=n_jobs),
+        "Decision Tree Classifier": DecisionTreeClassifier(max_depth=10),
+        "Random Forest Classifier": RandomForestClassifier(n_estimators=50, max_depth=10, n_jobs=n_jobs, random_state=42),
+        "Gradient Boosting Classifier": GradientBoostingClassifier(n_estimators=50, max_depth=5, random_state=42),
+        "XGBoost Classifier": XGBClassifier(eval_metric='logloss', n_estimators=50, max_depth=6, n_jobs=n_jobs, random_state=42),
+        "KNN Classifier": KNeighborsClassifier(n_neighbors=5, n_jobs=n_jobs),
+        "Support Vector Classifier (SVC)": SVC(kernel='rbf', probability=True, max_iter=2000)
+    }
+
+def train_models(file_path, target_column, n_jobs=1, feature_scorer="f_test", job_id=None):
     try:
         # OPTIMIZATION: Read only a subset of data to prevent memory crash
-        # We read slightly more than we need for sampling to get a good distribution, 
-        # but limit it to 10000 to keep RAM usage low.
-        df = pd.read_csv(file_path, nrows=10000)
+        # The planner sizes the read from the machine's memory and the time budget.
+        # We read more than we train on for sampling to get a good distribution.
+        df, plan = read_planned(file_path, plan_training, "read_rows")
         
         # 1. Preprocessing
         # Drop rows where target is missing
         df = df.dropna(subset=[target_column])
-
-        # Sample data if too large (though nrows limits it, this ensures exactly 3000 if available)
-        # Reduced to 3000 to prevent system crash on low-resource machines
-        if len(df) > 3000:
-            df = df.sample(n=3000, random_state=42)
-
         
         # Separate features and target
         X = df.drop(columns=[target_column])
@@ -79,6 +138,12 @@ def train_models(file_path, target_column):
         
         # -------------------------------
 
+        # Sample data if too large for the fit-time budget of this task's models
+        plan = refine_training_plan(plan, "Regression" if is_regression else "Classification")
+        if len(X) > plan["train_rows"]:
+            X = X.sample(n=plan["train_rows"], random_state=42)
+            y = y.loc[X.index]
+
         # --- OUTLIER REMOVAL (Numeric Features Only) ---
         # Using Z-score method (threshold = 3)
         # Only apply if dataset size allows (don't remove too much data)
@@ -132,7 +197,7 @@ def train_models(file_path, target_column):
         from sklearn.compose import ColumnTransformer
         from sklearn.pipeline import Pipeline
         from sklearn.preprocessing import OneHotEncoder
-        from sklearn.feature_selection import SelectFromModel, VarianceThreshold
+        from sklearn.feature_selection import VarianceThreshold
         
         # Define transformers
         numeric_transformer = Pipeline(steps=[
@@ -158,18 +223,19 @@ def train_models(file_path, target_column):
 
         # --- FEATURE SELECTION ---
         # 1. Variance Threshold (remove constant features)
-        # 2. Model-based selection (Lasso for Regression, RF for Classification)
+        # 2. Filter selection (ANOVA F / chi2 / correlation / mutual information scores)
+        # OPTIMIZATION: Scores are vectorized and cached per dataset hash + task, so re-runs
+        # on the same data skip scoring instead of fitting a model for selection every time.
         
-        selection_step = None
-        if is_regression:
-             selection_step = SelectFromModel(Lasso(alpha=0.01, random_state=42))
-        else:
-             selection_step = SelectFromModel(RandomForestClassifier(n_estimators=50, random_state=42))
+        selection_step = FilterSelector(
+            scorer=feature_scorer,
+            task_type="Regression" if is_regression else "Classification"
+        )
              
         # Create a full pipeline including feature selection
         # Note: We can't easily put this in the final pipeline object if we want to save just the preprocessor 
         # for prediction (unless we include selection in prediction too, which is good practice).
-        # However, SelectFromModel depends on the target 'y' during fit, so it's part of the training pipeline.
+        # However, the selector depends on the target 'y' during fit, so it's part of the training pipeline.
         
         # Let's wrap the preprocessor and selector
         full_pipeline = Pipeline(steps=[
@@ -182,34 +248,17 @@ def train_models(file_path, target_column):
         # 2. Define Models based on Task Type
         if is_regression:
             task_type = "Regression"
-            models = {
-                "Linear Regression": LinearRegression(),
-                "Ridge Regression": Ridge(),
-                "Lasso Regression": Lasso(),
-                "Random Forest Regressor": RandomForestRegressor(n_estimators=50, max_depth=10, n_jobs=1, random_state=42),
-                "Gradient Boosting Regressor": GradientBoostingRegressor(n_estimators=50, max_depth=5, random_state=42),
-                "XGBoost Regressor": XGBRegressor(n_estimators=50, max_depth=6, n_jobs=1, random_state=42),
-                "Support Vector Regressor (SVR)": SVR(kernel='rbf', max_iter=2000)
-            }
         else:
             task_type = "Classification"
             # Encode target if categorical (or if it was numeric but low cardinality treated as class)
             # Note: If it was already numeric (0, 1), LabelEncoder will just keep it as is or re-map it 0->0, 1->1
             le_target = LabelEncoder()
             y = le_target.fit_transform(y)
-                
-            models = {
-                "Logistic Regression": LogisticRegression(max_iter=500, n_jobs=1),
-                "Decision Tree Classifier": DecisionTreeClassifier(max_depth=10),
-                "Random Forest Classifier": RandomForestClassifier(n_estimators=50, max_depth=10, n_jobs=1, random_state=42),
-                "Gradient Boosting Classifier": GradientBoostingClassifier(n_estimators=50, max_depth=5, random_state=42),
-                "XGBoost Classifier": XGBClassifier(eval_metric='logloss', n_estimators=50, max_depth=6, n_jobs=1, random_state=42),
-                "KNN Classifier": KNeighborsClassifier(n_neighbors=5, n_jobs=1),
-                "Support Vector Classifier (SVC)": SVC(kernel='rbf', probability=True, max_iter=2000)
-            }
+        models = build_models(task_type, n_jobs)
 
         # Split Data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        X_train_raw = X_train
         
         # Fit and Transform Data using Preprocessor
         # We fit on train, transform on both
@@ -222,16 +271,49 @@ def train_models(file_path, target_column):
         best_score = -float('inf')
         best_model_obj = None
         
-        # 3. Train Models
-        total_models = len(models)
-        for i, (name, model) in enumerate(models.items()):
+        # 3. Schedule Models
+        # OPTIMIZATION: A cost model calibrated on timings of past runs predicts every candidate's
+        # fit time and memory. Candidates over their share of the budget are capped, subsampled
+        # or skipped up front, instead of e.g. SVC alone outlasting all the other models.
+        n_classes = len(np.unique(y_train)) if task_type == "Classification" else 1
+        classes = class_factor(task_type, n_classes)
+        width = X_train.shape[1]
+        time_budget = plan["time_budget_seconds"]
+        cost_model = FitCostModel(task_type)
+        schedule = cost_model.schedule(models, X_train.shape[0], width, n_classes, time_budget)
+
+        # 4. Train Models (cheapest first)
+        timings = []
+        started = time.perf_counter()
+        total_models = len(schedule)
+        for i, (name, decision) in enumerate(schedule.items()):
             # Report Progress
             progress = int((i / total_models) * 100)
             print(f"PROGRESS: {progress}", flush=True)
-            
+
+            if decision["action"] == "skip":
+                continue
+            elapsed = time.perf_counter() - started
+            if best_model_obj is not None and elapsed > time_budget * OVERRUN_FACTOR:
+                decision.update(action="skip", rows=0, reason=f"time budget exhausted ({elapsed:.1f}s of {time_budget:.0f}s spent)")
+                continue
+
+            model = models[name]
+            if "params" in decision:
+                model.set_params(**decision["params"])
+            X_fit, y_fit = X_train, y_train
+            if decision["rows"] < X_train.shape[0]:
+                idx = np.random.RandomState(42).choice(X_train.shape[0], decision["rows"], replace=False)
+                X_fit, y_fit = X_train[idx], np.asarray(y_train)[idx]
+
             try:
-                model.fit(X_train, y_train)
-                y_pred = model.predict(X_test)
+                with measure_fit() as usage:
+                    model.fit(X_fit, y_fit)
+                    y_pred = model.predict(X_test)
+                decision["actual_seconds"] = round(usage["seconds"], 3)
+                timings.append(cost_model.timing_record(
+                    name, X_fit.shape[0], width, classes, usage, decision.get("work_fraction", 1.0)
+                ))
                 
                 metrics = {}
                 if task_type == "Regression":
@@ -262,11 +344,25 @@ def train_models(file_path, target_column):
             except Exception as e:
                 results[name] = {"error": str(e)}
 
+        record_timings(timings)
+        # Report results in the usual candidate order; skipped candidates are only in model_schedule
+        results = {name: results[name] for name in models if name in results}
+
         # Final Progress
         print("PROGRESS: 100", flush=True)
 
-        # 4. Save Best Model
-        model_filename = f"best_model_{task_type}_{best_model_name.replace(' ', '_')}.pkl"
+        # 5. Feature Importance of the best model, per original column
+        # OPTIMIZATION: All permutation repeats of a column are predicted as one stacked batch,
+        # columns in parallel; X_test is only subsampled if that would exceed the time budget.
+        feature_importance = None
+        if best_model_obj is not None:
+            try:
+                feature_importance = permutation_importance(best_model_obj, full_pipeline, X_test, y_test, task_type, n_jobs)
+            except Exception as e:
+                print(f"Feature importance failed: {e}", flush=True)
+
+        # 6. Save Best Model
+        model_filename = artifact_filename(task_type, best_model_name, job_id)
         joblib.dump(best_model_obj, model_filename)
         
         # Also save the preprocessor for prediction later!
@@ -277,7 +373,14 @@ def train_models(file_path, target_column):
             "model": best_model_obj,
             "preprocessor": full_pipeline,
             "task_type": task_type,
-            "target_encoder": le_target if 'le_target' in locals() else None
+            "target_encoder": le_target if 'le_target' in locals() else None,
+            "model_name": best_model_name,
+            "target_column": target_column,
+            "feature_importance": feature_importance,
+            # Used by retrain.py for incremental updates and drift checks
+            "feature_stats": build_feature_stats(X_train_raw, num_cols, cat_cols),
+            # Base data for retrain.py's full refit; session snapshots are temporary files
+            "training_file": training_file_reference(file_path)
         }
         joblib.dump(final_artifact, model_filename)
 
@@ -305,7 +408,7 @@ def train_models(file_path, target_column):
             if len(viz_df) > 100:
                 viz_df = viz_df.sample(n=100, random_state=42)
             
-            visualization_data = viz_df.to_dict(orient='records')
+            visualization_data = frame_to_records(viz_df)
         except Exception as e:
             print(f"Visualization data generation failed: {e}", flush=True)
 
@@ -315,21 +418,32 @@ def train_models(file_path, target_column):
             "best_model": best_model_name,
             "best_score": best_score,
             "model_path": os.path.abspath(model_filename),
-            "visualization_data": visualization_data
+            "visualization_data": visualization_data,
+            "plan": plan,
+            "model_schedule": schedule,
+            "feature_importance": feature_importance,
+            "feature_selection": {
+                "scorer": feature_scorer,
+                "cache_hit": selection_step.cache_hit_,
+                "selected_features": int(selection_step.support_mask_.sum()),
+                "candidate_features": int(len(selection_step.support_mask_))
+            }
         }
         
         # Clean output
-        output = clean_nans(output)
-        
-        print(json.dumps(output, cls=NpEncoder))
+        return clean_nans(output)
         
     except Exception as e:
-        print(json.dumps({"error": str(e)}))
+        return {"error": str(e)}
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--file", required=True, help="Path or URL to the CSV file")
     parser.add_argument("--target", required=True, help="Target column name")
+    parser.add_argument("--n_jobs", type=int, default=1, help="CPU cores the estimators may use (allotted by scheduler.py)")
+    parser.add_argument("--feature_scorer", default="f_test", choices=SCORERS, help="Filter score used for feature selection")
+    parser.add_argument("--job_id", required=False, help="Job id, used to name the artifact (random if omitted)")
     args = parser.parse_args()
     
-    train_models(args.file, args.target)
+    result = train_models(args.file, args.target, args.n_jobs, args.feature_scorer, args.job_id)
+    print(json.dumps(result, cls=NpEncoder))
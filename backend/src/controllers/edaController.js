@@ -1,4 +1,5 @@
 import { runPython } from "../utils/pythonBridge.js";
+import { runSessionOperation } from "../utils/sessionService.js";
 
 export const performEDA = async (req, res) => {
     try {
@@ -13,7 +14,7 @@ export const performEDA = async (req, res) => {
             args.push("--target", targetColumn);
         }
 
-        const result = await runPython(args);
+        const result = await runSessionOperation(fileUrl, "eda", { target: targetColumn }) || await runPython(args);
 
         if (result.error) {
             return res.status(500).json({ error: result.error });
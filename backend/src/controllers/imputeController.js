@@ -1,9 +1,36 @@
 import { runPython } from "../utils/pythonBridge.js";
+import { runSessionOperation } from "../utils/sessionService.js";
 import supabase from "../db/index.js";
 import fs from "fs";
 import path from "path";
 import os from "os";
 
+const bucketName = "csv-uploads";
+
+// Overwrites the stored file with a local CSV, then deletes the local copy
+const replaceStoredFile = async (fileName, localPath) => {
+    try {
+        const fileContent = fs.readFileSync(localPath);
+
+        const { error: uploadError } = await supabase.storage
+            .from(bucketName)
+            .upload(fileName, fileContent, {
+                contentType: 'text/csv',
+                upsert: true
+            });
+
+        if (uploadError) {
+            throw new Error("Failed to update remote file: " + uploadError.message);
+        }
+    } finally {
+        try {
+            fs.unlinkSync(localPath);
+        } catch (cleanupErr) {
+            console.error("Failed to cleanup output temp file:", cleanupErr);
+        }
+    }
+};
+
 export const imputeData = async (req, res) => {
     try {
         const { fileUrl, column, strategy = 'auto' } = req.body;
@@ -12,14 +39,33 @@ export const imputeData = async (req, res) => {
             return res.status(400).json({ error: "fileUrl and column are required" });
         }
 
-        // 1. Download the file from Supabase to a temp file to ensure we have the latest version
-        // (Avoiding potential caching issues with pd.read_csv(url))
-        // Handle potential query params in URL
         const cleanUrl = fileUrl.split('?')[0];
         const urlParts = cleanUrl.split('/');
         const fileName = urlParts[urlParts.length - 1];
-        const bucketName = "csv-uploads";
 
+        // With a dataset session the imputation is applied in place, as a new version of
+        // the cached DataFrame that EDA and training use next. The stored file is brought
+        // up to date in the background, off the request path.
+        const sessionResult = await runSessionOperation(fileUrl, "impute", { column, strategy });
+        if (sessionResult) {
+            if (sessionResult.error) {
+                return res.status(500).json({ error: sessionResult.error });
+            }
+            if (sessionResult.imputed_count > 0) {
+                runSessionOperation(fileUrl, "export")
+                    .then((exported) => {
+                        if (!exported || exported.error) {
+                            throw new Error(exported ? exported.error : "session service unavailable");
+                        }
+                        return replaceStoredFile(fileName, exported.temp_path);
+                    })
+                    .catch((err) => console.error("Failed to persist imputed data:", err.message));
+            }
+            return res.json({ status: "success", data: sessionResult });
+        }
+
+        // 1. Download the file from Supabase to a temp file to ensure we have the latest version
+        // (Avoiding potential caching issues with pd.read_csv(url))
         const { data: fileData, error: downloadError } = await supabase.storage
             .from(bucketName)
             .download(fileName);
@@ -56,28 +102,9 @@ export const imputeData = async (req, res) => {
         // 3. Upload the result back to Supabase
         if (result.temp_path && fs.existsSync(result.temp_path)) {
             try {
-                const fileContent = fs.readFileSync(result.temp_path);
-
-                const { error: uploadError } = await supabase.storage
-                    .from(bucketName)
-                    .upload(fileName, fileContent, {
-                        contentType: 'text/csv',
-                        upsert: true
-                    });
-
-                if (uploadError) {
-                    throw new Error("Failed to update remote file: " + uploadError.message);
-                }
-
+                await replaceStoredFile(fileName, result.temp_path);
             } catch (uploadErr) {
                 return res.status(500).json({ error: uploadErr.message });
-            } finally {
-                // Cleanup output temp file
-                try {
-                    fs.unlinkSync(result.temp_path);
-                } catch (cleanupErr) {
-                    console.error("Failed to cleanup output temp file:", cleanupErr);
-                }
             }
         }
 
@@ -1,4 +1,4 @@
-import { runPython } from "../utils/pythonBridge.js";
+import { runPython, toRecords } from "../utils/pythonBridge.js";
 import fs from "fs";
 import path from "path";
 import os from "os";
@@ -21,7 +21,7 @@ export const predict = async (req, res) => {
             return res.status(400).json({ error: "Either inputData or file is required" });
         }
 
-        let pythonArgs = ["./python/predict.py", "--model", modelUrl];
+        let pythonArgs = ["./python/predict.py", "--model", modelUrl, "--format", "ndjson"];
         let tempInputPath = null;
 
         if (file) {
@@ -77,7 +77,7 @@ export const predict = async (req, res) => {
             res.json({
                 status: "success",
                 data: {
-                    preview: result.preview,
+                    preview: toRecords(result.preview),
                     csvContent: csvContent,
                     task_type: result.task_type
                 }
@@ -1,4 +1,5 @@
-import { runPython } from "../utils/pythonBridge.js";
+import { runPython, toRecords } from "../utils/pythonBridge.js";
+import { runSessionOperation } from "../utils/sessionService.js";
 
 export const getPreview = async (req, res) => {
     try {
@@ -8,17 +9,23 @@ export const getPreview = async (req, res) => {
             return res.status(400).json({ error: "fileUrl is required" });
         }
 
-        // Reuse get_metadata.py as it returns preview and columns
-        const metadata = await runPython([
+        // Served from the cached dataset session when available,
+        // otherwise reuse get_metadata.py as it returns preview and columns
+        const metadata = await runSessionOperation(fileUrl, "metadata") || await runPython([
             "./python/get_metadata.py",
             "--file",
-            fileUrl
+            fileUrl,
+            "--format",
+            "ndjson"
         ]);
 
         if (metadata.error) {
             return res.status(500).json({ error: metadata.error });
         }
 
+        // Rows arrive column-oriented from the stream; the frontend expects records
+        metadata.preview = toRecords(metadata.preview);
+
         res.json({ status: "success", data: metadata });
     } catch (err) {
         res.status(500).json({ error: err.message });
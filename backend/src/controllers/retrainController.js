@@ -0,0 +1,69 @@
+import { runPython } from "../utils/pythonBridge.js";
+import { uploadModel } from "../utils/modelStorage.js";
+import fs from "fs";
+
+export const retrainModel = async (req, res) => {
+    try {
+        const { modelUrl, fileUrl, targetColumn, baseFileUrl, driftThreshold, priority = 0 } = req.body;
+        const jobId = req.body.jobId || `retrain_${Date.now()}_${Math.random().toString(36).slice(2, 8)}`;
+
+        if (!modelUrl || !fileUrl) {
+            return res.status(400).json({ error: "modelUrl and fileUrl are required" });
+        }
+
+        // Runs through the job scheduler like training: own workspace, admission and CPU allotment
+        const args = [
+            "./python/scheduler.py", "retrain",
+            "--model", modelUrl,
+            "--file", fileUrl,
+            "--priority", String(priority),
+            "--job_id", jobId
+        ];
+        if (targetColumn) {
+            args.push("--target", targetColumn);
+        }
+        // Optional: the original training data, needed when drift or a missing class forces a full
+        // refit. Without it the artifact's own training file is used, and if that is gone too,
+        // the request fails with 409 refit_required instead of replacing the model.
+        if (baseFileUrl) {
+            args.push("--base_file", baseFileUrl);
+        }
+        if (driftThreshold !== undefined) {
+            args.push("--drift_threshold", String(driftThreshold));
+        }
+
+        // 1. Run Incremental Update (falls back to a full refit on drift)
+        const result = await runPython(args, (data) => {
+            console.log(`Retraining Progress: ${data.progress}%`);
+        });
+
+        // A full refit was needed but there is no base data: the stored model stays as it is
+        if (result.refit_required) {
+            return res.status(409).json({ status: "refit_required", error: result.error, refit_reason: result.refit_reason });
+        }
+
+        if (result.error) {
+            return res.status(500).json({ status: "error", error: result.error });
+        }
+
+        // 2. Upload Updated Model to Supabase
+        const updatedModelUrl = await uploadModel(result.model_path);
+
+        // The workspace is only needed locally if the upload failed
+        if (updatedModelUrl && result.workspace) {
+            fs.rmSync(result.workspace, { recursive: true, force: true });
+        }
+
+        res.json({
+            status: "success",
+            data: {
+                ...result,
+                model_url: updatedModelUrl
+            }
+        });
+
+    } catch (err) {
+        console.error("Retrain Controller Error:", err);
+        res.status(500).json({ status: "error", error: err.message });
+    }
+};
@@ -1,23 +1,36 @@
 import { runPython } from "../utils/pythonBridge.js";
-import supabase from "../db/index.js";
+import { uploadModel } from "../utils/modelStorage.js";
+import { runSessionOperation } from "../utils/sessionService.js";
 import fs from "fs";
-import path from "path";
 
 export const trainModels = async (req, res) => {
     try {
-        const { fileUrl, targetColumn } = req.body;
+        const { fileUrl, targetColumn, priority = 0 } = req.body;
+        // Clients may pass their own jobId so they can cancel the job while it runs
+        const jobId = req.body.jobId || `train_${Date.now()}_${Math.random().toString(36).slice(2, 8)}`;
 
         if (!fileUrl || !targetColumn) {
             return res.status(400).json({ error: "fileUrl and targetColumn are required" });
         }
 
-        // 1. Run Training Script
-        const result = await runPython([
-            "./python/train.py",
+        // 1. Run Training Script through the job scheduler
+        // (isolated workspace, memory-based admission, per-job CPU allotment).
+        // With a dataset session, it trains on a snapshot of the session's current version.
+        const result = await runSessionOperation(fileUrl, "train", {
+            target: targetColumn,
+            priority,
+            job_id: jobId
+        }) || await runPython([
+            "./python/scheduler.py",
+            "submit",
             "--file",
             fileUrl,
             "--target",
-            targetColumn
+            targetColumn,
+            "--priority",
+            String(priority),
+            "--job_id",
+            jobId
         ], (data) => {
             // Log progress to server console instead of streaming to client
             console.log(`Training Progress: ${data.progress}%`);
@@ -28,59 +41,11 @@ export const trainModels = async (req, res) => {
         }
 
         // 2. Upload Best Model to Supabase
-        let modelUrl = "";
-        if (result.model_path && fs.existsSync(result.model_path)) {
-            try {
-                const modelFileContent = fs.readFileSync(result.model_path);
-                const modelFileName = path.basename(result.model_path);
-                const bucketName = "models";
+        const modelUrl = await uploadModel(result.model_path);
 
-                // Ensure bucket exists
-                const { data: buckets, error: listError } = await supabase.storage.listBuckets();
-                if (!listError) {
-                    const bucketExists = buckets.find(b => b.name === bucketName);
-                    if (!bucketExists) {
-                        console.log(`Bucket '${bucketName}' not found. Creating...`);
-                        const { error: createError } = await supabase.storage.createBucket(bucketName, {
-                            public: true
-                        });
-                        if (createError) {
-                            console.error("Failed to create bucket:", createError);
-                        }
-                    }
-                }
-
-                const { data, error } = await supabase.storage
-                    .from(bucketName)
-                    .upload(modelFileName, modelFileContent, {
-                        contentType: 'application/octet-stream',
-                        upsert: true
-                    });
-
-                if (error) {
-                    console.error("Model upload failed:", error);
-                    // Do not delete local file if upload fails, so we can use it locally/temporarily
-                } else {
-                    const { data: publicUrlData } = supabase.storage
-                        .from(bucketName)
-                        .getPublicUrl(modelFileName);
-
-                    modelUrl = publicUrlData.publicUrl;
-
-                    // Cleanup local file only if upload succeeded
-                    try {
-                        if (fs.existsSync(result.model_path)) {
-                            fs.unlinkSync(result.model_path);
-                        }
-                    } catch (cleanupErr) {
-                        console.error("Failed to cleanup model file:", cleanupErr);
-                    }
-                }
-
-            } catch (uploadErr) {
-                console.error("Model upload error:", uploadErr);
-                // Do not delete local file if error
-            }
+        // The workspace is only needed locally if the upload failed
+        if (modelUrl && result.workspace) {
+            fs.rmSync(result.workspace, { recursive: true, force: true });
         }
 
         // Send final result as standard JSON
@@ -97,3 +62,26 @@ export const trainModels = async (req, res) => {
         res.status(500).json({ status: "error", error: err.message });
     }
 };
+
+export const cancelTraining = async (req, res) => {
+    try {
+        const result = await runPython(["./python/scheduler.py", "cancel", "--job_id", req.params.jobId]);
+
+        if (result.error) {
+            return res.status(404).json({ status: "error", error: result.error });
+        }
+
+        res.json({ status: "success", data: result });
+    } catch (err) {
+        res.status(500).json({ status: "error", error: err.message });
+    }
+};
+
+export const getTrainingJobs = async (req, res) => {
+    try {
+        const result = await runPython(["./python/scheduler.py", "status"]);
+        res.json({ status: "success", data: result });
+    } catch (err) {
+        res.status(500).json({ status: "error", error: err.message });
+    }
+};
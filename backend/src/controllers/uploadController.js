@@ -1,5 +1,6 @@
 import supabase from "../db/index.js";
-import { runPython } from "../utils/pythonBridge.js";
+import { runPython, toRecords } from "../utils/pythonBridge.js";
+import { runSessionOperation } from "../utils/sessionService.js";
 
 export const handleUpload = async (req, res) => {
     try {
@@ -31,11 +32,15 @@ export const handleUpload = async (req, res) => {
         // Get Metadata using Python
         let metadata = {};
         try {
-            metadata = await runPython([
+            // Opens the dataset session, so the next steps find the file already parsed
+            metadata = await runSessionOperation(publicUrl, "metadata") || await runPython([
                 "./python/get_metadata.py",
                 "--file",
-                publicUrl
+                publicUrl,
+                "--format",
+                "ndjson"
             ]);
+            metadata.preview = toRecords(metadata.preview);
         } catch (pyError) {
             console.error("Python metadata extraction failed:", pyError);
             metadata = { error: "Failed to extract metadata" };
@@ -1,6 +1,7 @@
 import dotenv from "dotenv";
 import { app } from "./app.js";
 import supabase from "./db/index.js";
+import { startSessionService } from "./utils/sessionService.js";
 
 dotenv.config({
     path: './.env'
@@ -8,6 +9,9 @@ dotenv.config({
 
 const PORT = process.env.PORT || 8000;
 
+// Dataset session service shared by preview, EDA, impute and train
+startSessionService();
+
 // Increase timeout to 5 minutes
 const server = app.listen(PORT, "0.0.0.0", async () => {
     console.log(`⚙️ Server is running at port : ${PORT}`);
@@ -5,6 +5,7 @@ import trainRoutes from "./train.js";
 import previewRoutes from "./preview.js";
 import edaRoutes from "./eda.js";
 import imputeRoutes from "./impute.js";
+import retrainRoutes from "./retrain.js";
 
 const router = express.Router();
 
@@ -14,5 +15,6 @@ router.use("/train", trainRoutes);
 router.use("/preview", previewRoutes);
 router.use("/eda", edaRoutes);
 router.use("/impute", imputeRoutes);
+router.use("/retrain", retrainRoutes);
 
 export default router;
@@ -0,0 +1,8 @@
+import express from "express";
+import { retrainModel } from "../controllers/retrainController.js";
+
+const router = express.Router();
+
+router.post("/", retrainModel);
+
+export default router;
@@ -1,8 +1,10 @@
 import express from "express";
-import { trainModels } from "../controllers/trainController.js";
+import { trainModels, cancelTraining, getTrainingJobs } from "../controllers/trainController.js";
 
 const router = express.Router();
 
 router.post("/", trainModels);
+router.get("/jobs", getTrainingJobs);
+router.delete("/jobs/:jobId", cancelTraining);
 
 export default router;
@@ -0,0 +1,68 @@
+import supabase from "../db/index.js";
+import fs from "fs";
+import path from "path";
+
+// Uploads a trained model artifact to Supabase storage and returns its public URL.
+// Artifact names carry the job id (see train.py artifact_filename), so an existing object
+// is never overwritten: a name clash fails the upload instead of replacing another job's model.
+// The local file is removed only if the upload succeeded, so it can still be used locally otherwise.
+export const uploadModel = async (modelPath) => {
+    let modelUrl = "";
+    if (!modelPath || !fs.existsSync(modelPath)) {
+        return modelUrl;
+    }
+
+    try {
+        const modelFileContent = fs.readFileSync(modelPath);
+        const modelFileName = path.basename(modelPath);
+        const bucketName = "models";
+
+        // Ensure bucket exists
+        const { data: buckets, error: listError } = await supabase.storage.listBuckets();
+        if (!listError) {
+            const bucketExists = buckets.find(b => b.name === bucketName);
+            if (!bucketExists) {
+                console.log(`Bucket '${bucketName}' not found. Creating...`);
+                const { error: createError } = await supabase.storage.createBucket(bucketName, {
+                    public: true
+                });
+                if (createError) {
+                    console.error("Failed to create bucket:", createError);
+                }
+            }
+        }
+
+        const { data, error } = await supabase.storage
+            .from(bucketName)
+            .upload(modelFileName, modelFileContent, {
+                contentType: 'application/octet-stream',
+                upsert: false
+            });
+
+        if (error) {
+            console.error("Model upload failed:", error);
+            // Do not delete local file if upload fails, so we can use it locally/temporarily
+        } else {
+            const { data: publicUrlData } = supabase.storage
+                .from(bucketName)
+                .getPublicUrl(modelFileName);
+
+            modelUrl = publicUrlData.publicUrl;
+
+            // Cleanup local file only if upload succeeded
+            try {
+                if (fs.existsSync(modelPath)) {
+                    fs.unlinkSync(modelPath);
+                }
+            } catch (cleanupErr) {
+                console.error("Failed to cleanup model file:", cleanupErr);
+            }
+        }
+
+    } catch (uploadErr) {
+        console.error("Model upload error:", uploadErr);
+        // Do not delete local file if error
+    }
+
+    return modelUrl;
+};
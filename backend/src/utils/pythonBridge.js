@@ -1,5 +1,16 @@
 import { spawn } from "child_process";
 
+// Converts a streamed { columns, rows } table back to an array of records.
+// Arrays (legacy JSON output or flat streamed columns) are returned unchanged.
+export const toRecords = (table) => {
+    if (!table || Array.isArray(table)) return table;
+    return table.rows.map(row => {
+        const record = {};
+        table.columns.forEach((col, i) => { record[col] = row[i]; });
+        return record;
+    });
+};
+
 export const runPython = (args, onData) => {
     return new Promise((resolve, reject) => {
         const pythonCommand = process.platform === "win32" ? "python" : "python3";
@@ -14,36 +25,75 @@ export const runPython = (args, onData) => {
         let error = "";
         let lineBuffer = "";
 
-        py.stdout.on("data", (d) => {
-            const str = d.toString();
-            output += str;
-
-            if (onData) {
-                lineBuffer += str;
-                const lines = lineBuffer.split('\n');
-                // Keep the last partial line
-                lineBuffer = lines.pop();
-
-                lines.forEach(line => {
-                    if (line.startsWith("PROGRESS:")) {
-                        const progress = parseInt(line.split(":")[1].trim());
-                        onData({ progress });
-                    }
-                });
+        // NDJSON output (--format ndjson) is parsed line by line as it arrives,
+        // so large tables are never buffered as one big string
+        const tables = {};
+        let streamedResult = null;
+
+        const handleNdjson = (line) => {
+            const msg = JSON.parse(line);
+            if (msg.ndjson === "columns") {
+                tables[msg.key] = { columns: msg.columns, flat: msg.flat, rows: [] };
+            } else if (msg.ndjson === "rows") {
+                const rows = tables[msg.key].rows;
+                for (const row of msg.rows) rows.push(row);
+            } else if (msg.ndjson === "result") {
+                streamedResult = msg.data;
+            }
+        };
+
+        const handleLine = (line) => {
+            if (line.startsWith("PROGRESS:")) {
+                if (onData) {
+                    const progress = parseInt(line.split(":")[1].trim());
+                    onData({ progress });
+                }
+                return;
+            }
+
+            if (line.startsWith('{"ndjson":')) {
+                try {
+                    return handleNdjson(line);
+                } catch (e) {
+                    // Not a valid stream message, keep it for the regular parser
+                }
             }
+
+            output += line + "\n";
+        };
+
+        py.stdout.on("data", (d) => {
+            lineBuffer += d.toString();
+            const lines = lineBuffer.split('\n');
+            // Keep the last partial line
+            lineBuffer = lines.pop();
+            lines.forEach(handleLine);
         });
 
         py.stderr.on("data", (d) => (error += d.toString()));
 
         py.on("close", () => {
+            if (lineBuffer) {
+                handleLine(lineBuffer);
+            }
+
             if (error) {
                 console.error("Python Stderr:", error);
             }
 
+            if (streamedResult) {
+                for (const [key, table] of Object.entries(tables)) {
+                    streamedResult[key] = table.flat
+                        ? table.rows
+                        : { columns: table.columns, rows: table.rows };
+                }
+                return resolve(streamedResult);
+            }
+
             try {
-                // Filter out progress lines
-                const lines = output.split('\n').filter(line => !line.startsWith("PROGRESS:"));
-                const cleanOutput = lines.join('\n').trim();
+                // Progress lines were already filtered out in handleLine
+                const lines = output.split('\n');
+                const cleanOutput = output.trim();
 
                 // Attempt 1: Parse the whole cleaned output
                 try {
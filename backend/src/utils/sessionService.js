@@ -0,0 +1,101 @@
+import { spawn } from "child_process";
+import { createHash } from "crypto";
+
+// Long-lived Python dataset session service (python/session_service.py).
+// Preview, EDA, impute and train run against its in-memory DataFrames instead of
+// every script parsing the CSV again. Set SESSION_SERVICE=off to disable it, or
+// SESSION_SERVICE_URL to use a service that is already running.
+const PORT = process.env.SESSION_SERVICE_PORT || 5001;
+let serviceUrl = process.env.SESSION_SERVICE_URL || null;
+let serviceProcess = null;
+
+export const startSessionService = () => {
+    if (process.env.SESSION_SERVICE === "off" || serviceUrl) return;
+
+    const pythonCommand = process.platform === "win32" ? "python" : "python3";
+    serviceProcess = spawn(pythonCommand, ["./python/session_service.py", "--port", String(PORT)], {
+        stdio: ["ignore", "inherit", "inherit"]
+    });
+    serviceUrl = `http://127.0.0.1:${PORT}`;
+
+    // Without the service every operation falls back to the standalone scripts
+    const stop = (reason) => {
+        console.error(`Session service unavailable: ${reason}`);
+        serviceProcess = null;
+        serviceUrl = null;
+    };
+    serviceProcess.on("error", (err) => stop(err.message));
+    serviceProcess.on("exit", (code) => stop(`exited with code ${code}`));
+    process.on("exit", () => serviceProcess?.kill());
+};
+
+// One session per stored file, so every step of the flow finds the same DataFrame
+export const sessionIdFor = (fileUrl) =>
+    createHash("sha1").update(fileUrl.split("?")[0]).digest("hex").slice(0, 16);
+
+// Operations that change state (a new session version, a queued training job). Once such a
+// request may have reached the service, running the script as well could apply it twice.
+const MUTATING_OPERATIONS = new Set(["train", "impute"]);
+const JOB_POLL_MS = 2000;
+const JOB_POLL_MAX_FAILURES = 5;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Training returns at once with a job id; its result is polled, so no request stays open
+// for the whole queue wait and training run (fetch gives up after 300s without headers).
+const waitForJob = async (baseUrl, jobId) => {
+    let failures = 0;
+    while (true) {
+        await sleep(JOB_POLL_MS);
+        let response;
+        try {
+            response = await fetch(`${baseUrl}/jobs/${encodeURIComponent(jobId)}`);
+        } catch (err) {
+            if (++failures >= JOB_POLL_MAX_FAILURES) {
+                throw new Error(`Lost the session service while job ${jobId} was running: ${err.message}`);
+            }
+            continue;
+        }
+        failures = 0;
+        const result = await response.json();
+        if (result.status !== "running") return result;
+    }
+};
+
+// Runs an operation on the session of fileUrl (opened from the file on first use).
+// Resolves to null when callers should fall back to runPython: the service is not running,
+// the request never reached it, or it could not start the operation (503). Read-only
+// operations also fall back on any other failure; train and impute do not, since the
+// service may already have applied them. Errors of the operation (4xx) are returned as they are.
+export const runSessionOperation = async (fileUrl, operation, params = {}) => {
+    if (!serviceUrl) return null;
+    const baseUrl = serviceUrl;
+    const mutating = MUTATING_OPERATIONS.has(operation);
+
+    let response;
+    try {
+        response = await fetch(`${baseUrl}/sessions/${sessionIdFor(fileUrl)}/${operation}`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ file: fileUrl, ...params })
+        });
+    } catch (err) {
+        // Still starting up, or gone: the request never reached the service
+        if (!mutating || err.cause?.code === "ECONNREFUSED") {
+            console.error(`Session service request failed (${err.message}), falling back to scripts`);
+            return null;
+        }
+        throw new Error(`Session service ${operation} request failed after it was sent: ${err.message}`);
+    }
+    if (response.status === 503 || (response.status >= 500 && !mutating)) {
+        const { error } = await response.json().catch(() => ({}));
+        console.error(`Session service failed on ${operation} (${error || response.status}), falling back to scripts`);
+        return null;
+    }
+
+    const result = await response.json();
+    if (operation === "train" && result.status === "running" && result.job_id) {
+        return waitForJob(baseUrl, result.job_id);
+    }
+    return result;
+};
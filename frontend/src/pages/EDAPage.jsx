@@ -62,6 +62,11 @@ const EDAPage = () => {
     // Calculate stats if available
     const correlationData = edaResults?.correlation || {};
     const correlationKeys = Object.keys(correlationData);
+    // Wide data: the backend returns the strongest pairs instead of the full matrix
+    const isSparse = edaResults?.correlation_mode === 'sparse';
+    const topCorrelations = edaResults?.top_correlations || [];
+    const mutualInformation = Object.entries(edaResults?.mutual_information || {})
+        .sort(([, a], [, b]) => b - a);
 
     const getCorrelationColor = (value) => {
         if (value === null || value === undefined) return 'transparent';
@@ -141,9 +146,39 @@ const EDAPage = () => {
 
                         {/* Correlations */}
                         <div className="card full-width animate-fade-in">
-                            <h3>Correlation Matrix</h3>
+                            <h3>{isSparse ? 'Strongest Correlations' : 'Correlation Matrix'}</h3>
                             <div className="correlation-container">
-                                {correlationKeys.length > 0 ? (
+                                {isSparse ? (
+                                    topCorrelations.length > 0 ? (
+                                        <table className="data-table correlation-table">
+                                            <thead>
+                                                <tr>
+                                                    <th>Feature A</th>
+                                                    <th>Feature B</th>
+                                                    <th>Correlation</th>
+                                                </tr>
+                                            </thead>
+                                            <tbody>
+                                                {topCorrelations.map(({ feature_a, feature_b, corr }) => (
+                                                    <tr key={`${feature_a}-${feature_b}`}>
+                                                        <td className="row-header" title={feature_a}>{feature_a}</td>
+                                                        <td title={feature_b}>{feature_b}</td>
+                                                        <td
+                                                            style={{
+                                                                backgroundColor: getCorrelationColor(corr),
+                                                                color: Math.abs(corr) > 0.5 ? 'white' : '#ccc'
+                                                            }}
+                                                        >
+                                                            {corr.toFixed(2)}
+                                                        </td>
+                                                    </tr>
+                                                ))}
+                                            </tbody>
+                                        </table>
+                                    ) : (
+                                        <p className="text-secondary">No feature pairs above the correlation threshold.</p>
+                                    )
+                                ) : correlationKeys.length > 0 ? (
                                     <table className="data-table correlation-table">
                                         <thead>
                                             <tr>
@@ -158,7 +193,7 @@ const EDAPage = () => {
                                                 <tr key={rowKey}>
                                                     <td className="row-header" title={rowKey}>{rowKey.length > 15 ? rowKey.substring(0, 15) + '...' : rowKey}</td>
                                                     {correlationKeys.map(colKey => {
-                                                        const val = correlationData[rowKey][colKey];
+                                                        const val = correlationData[rowKey]?.[colKey] ?? null;
                                                         return (
                                                             <td
                                                                 key={`${rowKey}-${colKey}`}
@@ -181,6 +216,31 @@ const EDAPage = () => {
                                 )}
                             </div>
                         </div>
+
+                        {/* Mutual Information of categorical features with the target */}
+                        {mutualInformation.length > 0 && (
+                            <div className="card full-width animate-fade-in">
+                                <h3>Mutual Information with Target</h3>
+                                <div className="correlation-container">
+                                    <table className="data-table correlation-table">
+                                        <thead>
+                                            <tr>
+                                                <th>Feature</th>
+                                                <th>Mutual Information</th>
+                                            </tr>
+                                        </thead>
+                                        <tbody>
+                                            {mutualInformation.map(([feature, score]) => (
+                                                <tr key={feature}>
+                                                    <td className="row-header" title={feature}>{feature}</td>
+                                                    <td>{score.toFixed(4)}</td>
+                                                </tr>
+                                            ))}
+                                        </tbody>
+                                    </table>
+                                </div>
+                            </div>
+                        )}
                     </>
                 )}
             </div>
@@ -22,8 +22,9 @@ const PredictPage = () => {
         // Determine feature order based on EDA correlation data
         let features = metadata?.columns?.filter(col => col !== targetColumn) || [];
 
-        if (edaResults && edaResults.correlation && targetColumn) {
-            const targetCorrelations = edaResults.correlation[targetColumn];
+        if (edaResults && targetColumn) {
+            // Wide data (sparse correlation mode) has no matrix, only the target's correlations
+            const targetCorrelations = edaResults.target_correlations || edaResults.correlation?.[targetColumn];
             if (targetCorrelations) {
                 // Sort features by correlation strength (descending)
                 features.sort((a, b) => {
@@ -0,0 +1,259 @@
+import argparse
+import gzip
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Streams a synthetic CSV of any size to disk, chunk by chunk, for load and scale testing
+# of get_metadata.py, eda.py, impute.py, train.py and predict.py.
+#
+#   python generate_large_dataset.py --rows 2000000 --numeric 150 --categorical 50 \
+#       --task classification --missing_rate 0.05 --output datasets/large_classification.csv
+#
+# The target is a known function of the informative features (written to the metadata
+# sidecar), so model quality on the generated file can be checked against the truth.
+
+MISSING_PATTERNS = ["mcar", "mar", "mnar"]
+# With --size_mb, the first chunk measures the bytes per row; later chunks are sized from it
+SIZE_PROBE_ROWS = 1000
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+class DatasetSpec:
+    """Everything fixed across chunks: column layout, scales, factor loadings and the true target function."""
+
+    def __init__(self, args):
+        rng = np.random.default_rng(args.seed)
+        self.args = args
+
+        self.numeric_names = [f"Num_{i + 1}" for i in range(args.numeric)]
+        self.categorical_names = [f"Cat_{i + 1}" for i in range(args.categorical)]
+
+        # Numeric columns share a few latent factors, so they are correlated like real data
+        self.n_factors = max(1, min(5, args.numeric))
+        self.loadings = rng.normal(size=(self.n_factors, args.numeric))
+        self.loadings /= np.linalg.norm(self.loadings, axis=0, keepdims=True)
+        self.locs = rng.uniform(-100, 100, size=args.numeric).round(1)
+        self.scales = np.exp(rng.uniform(0, 4, size=args.numeric)).round(2)
+
+        # Categorical levels follow a Zipf-like frequency distribution
+        self.cardinalities = rng.integers(2, max(args.cardinality, 2) + 1, size=args.categorical)
+        self.level_cumprobs = []
+        self.level_effects = []
+        for cardinality in self.cardinalities:
+            weights = 1.0 / np.arange(1, cardinality + 1) ** args.category_skew
+            self.level_cumprobs.append(np.cumsum(weights / weights.sum()))
+            self.level_effects.append(rng.normal(size=cardinality))
+
+        # True target function: linear in the informative standardized numerics, plus level effects
+        n_informative = min(args.informative, args.numeric + args.categorical)
+        informative = rng.choice(args.numeric + args.categorical, size=n_informative, replace=False)
+        self.informative_numeric = sorted(int(i) for i in informative if i < args.numeric)
+        self.informative_categorical = sorted(int(i) - args.numeric for i in informative if i >= args.numeric)
+        n_outputs = args.n_classes if args.task == "classification" and args.n_classes > 2 else 1
+        self.coefs = rng.normal(size=(len(self.informative_numeric), n_outputs)).round(3)
+        self.cat_weights = rng.uniform(0.5, 1.5, size=(len(self.informative_categorical), n_outputs)).round(3)
+
+        # MAR missingness is driven by the first numeric column, which itself stays complete
+        self.mar_driver = 0 if args.numeric else None
+
+    def metadata(self):
+        args = self.args
+        return {
+            "rows": args.rows,
+            "seed": args.seed,
+            "task": args.task,
+            "target_column": args.target_name,
+            "n_classes": args.n_classes if args.task == "classification" else None,
+            "numeric_columns": self.numeric_names,
+            "categorical_columns": {
+                name: int(cardinality) for name, cardinality in zip(self.categorical_names, self.cardinalities)
+            },
+            "informative_numeric": {
+                self.numeric_names[i]: self.coefs[j].tolist() for j, i in enumerate(self.informative_numeric)
+            },
+            "informative_categorical": {
+                self.categorical_names[i]: self.cat_weights[j].tolist() for j, i in enumerate(self.informative_categorical)
+            },
+            "noise": args.noise,
+            "missing_rate": args.missing_rate,
+            "missing_pattern": args.missing_pattern,
+            "mar_driver": self.numeric_names[self.mar_driver] if self.mar_driver is not None else None,
+            "outlier_fraction": args.outlier_fraction
+        }
+
+def _missing_mask(rng, shape, rate, pattern, latent, driver):
+    """
+    Cells to blank out, with expected share `rate` under every pattern.
+    mcar: uniform. mar: depends on the observed driver column. mnar: depends on the cell's own value.
+    """
+    if rate <= 0:
+        return np.zeros(shape, dtype=bool)
+    if pattern == "mar" and driver is not None:
+        # sigmoid of a symmetric variable has mean 0.5, so the overall rate is preserved
+        prob = 2 * rate * _sigmoid(1.7 * driver)[:, None]
+    elif pattern == "mnar":
+        prob = 2 * rate * latent
+    else:
+        prob = np.full(shape, rate)
+    return rng.random(shape) < np.clip(prob, 0, 1)
+
+def generate_chunk(spec, rng, n_rows):
+    args = spec.args
+    columns = {}
+
+    # Numeric features, standardized first so the target function is scale free
+    factors = rng.normal(size=(n_rows, spec.n_factors))
+    z = np.sqrt(1 - args.correlation) * rng.normal(size=(n_rows, args.numeric)) \
+        + np.sqrt(args.correlation) * factors @ spec.loadings
+    n_outputs = spec.coefs.shape[1]
+    signal = z[:, spec.informative_numeric] @ spec.coefs if spec.informative_numeric else np.zeros((n_rows, n_outputs))
+
+    # Categorical features: level drawn from a uniform u, so rarer levels have larger u
+    cat_u = rng.random(size=(n_rows, args.categorical))
+    cat_codes = np.empty((n_rows, args.categorical), dtype=np.int64)
+    for j, cumprobs in enumerate(spec.level_cumprobs):
+        cat_codes[:, j] = np.minimum(np.searchsorted(cumprobs, cat_u[:, j]), len(cumprobs) - 1)
+    for k, j in enumerate(spec.informative_categorical):
+        signal += spec.level_effects[j][cat_codes[:, j]][:, None] * spec.cat_weights[k]
+
+    # Target
+    if args.task == "regression":
+        target = (signal[:, 0] + args.noise * rng.normal(size=n_rows)).round(4)
+    elif n_outputs == 1:
+        target = (rng.random(n_rows) < _sigmoid(signal[:, 0] / max(args.noise, 1e-3))).astype(np.int64)
+    else:
+        # Gumbel-max trick samples from softmax(signal / noise) without normalizing
+        logits = signal / max(args.noise, 1e-3) + rng.gumbel(size=signal.shape)
+        target = logits.argmax(axis=1)
+
+    # Outliers are measurement errors: added after the target, so they carry no signal
+    values = spec.locs + spec.scales * z
+    if args.outlier_fraction > 0:
+        outliers = rng.random(values.shape) < args.outlier_fraction
+        magnitude = rng.uniform(8, 12, size=values.shape) * rng.choice([-1, 1], size=values.shape)
+        values = np.where(outliers, spec.locs + spec.scales * magnitude, values)
+
+    driver = z[:, spec.mar_driver] if spec.mar_driver is not None else None
+    numeric_missing = _missing_mask(rng, values.shape, args.missing_rate, args.missing_pattern, _sigmoid(1.7 * z), driver)
+    if spec.mar_driver is not None and args.missing_pattern == "mar":
+        numeric_missing[:, spec.mar_driver] = False
+    values[numeric_missing] = np.nan
+    categorical_missing = _missing_mask(rng, cat_codes.shape, args.missing_rate, args.missing_pattern, cat_u, driver)
+
+    for j, name in enumerate(spec.numeric_names):
+        columns[name] = values[:, j].round(args.decimals)
+    for j, name in enumerate(spec.categorical_names):
+        levels = np.array([f"C{j + 1}_L{level + 1}" for level in range(spec.cardinalities[j])], dtype=object)
+        labels = levels[cat_codes[:, j]]
+        labels[categorical_missing[:, j]] = None
+        columns[name] = labels
+    columns[args.target_name] = target
+
+    return pd.DataFrame(columns)
+
+def generate(args):
+    """Write the CSV chunk by chunk; memory stays bounded by --chunk_rows whatever the file size."""
+    spec = DatasetSpec(args)
+    target_bytes = int(args.size_mb * 1024 ** 2) if args.size_mb else None
+    compress = args.output.endswith(".gz")
+
+    rows_written, bytes_written, file_bytes, chunk_index = 0, 0, 0, 0
+    target_stats = np.zeros(2)
+    class_counts = {}
+    # --size_mb is measured on disk: for .gz output the raw file position is the compressed
+    # size written so far, once each chunk is sync-flushed out of the compressor
+    with open(args.output, "wb") as raw:
+        f = gzip.GzipFile(fileobj=raw, mode="wb") if compress else raw
+        while True:
+            if target_bytes is not None:
+                if file_bytes >= target_bytes:
+                    break
+                # Size the chunk from the bytes per row so far, so the file stops near the target
+                if rows_written and file_bytes:
+                    n_rows = int(np.clip(np.ceil((target_bytes - file_bytes) * rows_written / file_bytes), 1, args.chunk_rows))
+                else:
+                    n_rows = min(args.chunk_rows, SIZE_PROBE_ROWS)
+            else:
+                n_rows = min(args.chunk_rows, args.rows - rows_written)
+                if n_rows <= 0:
+                    break
+
+            # Per-chunk generator: the same seed and chunk size always reproduce the same file
+            rng = np.random.default_rng([args.seed, chunk_index])
+            chunk = generate_chunk(spec, rng, n_rows)
+            text = chunk.to_csv(index=False, header=(chunk_index == 0)).encode()
+            f.write(text)
+
+            target = chunk[args.target_name].to_numpy()
+            if args.task == "regression":
+                target_stats += [target.sum(), (target ** 2).sum()]
+            else:
+                for label, count in zip(*np.unique(target, return_counts=True)):
+                    class_counts[int(label)] = class_counts.get(int(label), 0) + int(count)
+
+            rows_written += n_rows
+            bytes_written += len(text)
+            if compress and target_bytes is not None:
+                # Without this, zlib still holds most of the chunk and raw.tell() undercounts
+                f.flush()
+            file_bytes = raw.tell()
+            chunk_index += 1
+            print(f"PROGRESS: {rows_written} rows, {file_bytes / 1024 ** 2:.1f} MB", file=sys.stderr, flush=True)
+        if compress:
+            f.close()
+        file_bytes = raw.tell()
+
+    args.rows = rows_written
+    metadata = spec.metadata()
+    metadata.update({
+        "output": args.output,
+        "columns": args.numeric + args.categorical + 1,
+        "file_mb": round(file_bytes / 1024 ** 2, 1),
+        "uncompressed_mb": round(bytes_written / 1024 ** 2, 1)
+    })
+    if args.task == "regression":
+        mean = target_stats[0] / rows_written
+        metadata["target_mean"] = round(mean, 4)
+        metadata["target_std"] = round(float(np.sqrt(max(target_stats[1] / rows_written - mean ** 2, 0))), 4)
+    else:
+        metadata["class_counts"] = class_counts
+
+    if args.metadata:
+        with open(args.metadata, "w") as f:
+            json.dump(metadata, f, indent=2)
+    return metadata
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a synthetic CSV of arbitrary size to disk")
+    parser.add_argument("--output", default="datasets/synthetic_large.csv", help="CSV path (.gz to compress)")
+    parser.add_argument("--rows", type=int, default=1000000, help="Number of rows")
+    parser.add_argument("--size_mb", type=float, default=None, help="Generate until the file on disk (compressed, for .gz) reaches this size instead of --rows")
+    parser.add_argument("--numeric", type=int, default=20, help="Number of numeric columns")
+    parser.add_argument("--categorical", type=int, default=5, help="Number of categorical columns")
+    parser.add_argument("--cardinality", type=int, default=20, help="Maximum levels per categorical column")
+    parser.add_argument("--category_skew", type=float, default=1.0, help="Zipf exponent of the level frequencies (0 = uniform)")
+    parser.add_argument("--correlation", type=float, default=0.3, help="Share of numeric variance from shared latent factors (0-1)")
+    parser.add_argument("--missing_rate", type=float, default=0.0, help="Expected share of missing feature cells")
+    parser.add_argument("--missing_pattern", default="mcar", choices=MISSING_PATTERNS, help="Missingness mechanism")
+    parser.add_argument("--outlier_fraction", type=float, default=0.0, help="Share of numeric cells replaced by 8-12 sigma outliers")
+    parser.add_argument("--task", default="regression", choices=["regression", "classification"], help="Kind of target")
+    parser.add_argument("--n_classes", type=int, default=2, help="Classes for a classification target")
+    parser.add_argument("--informative", type=int, default=5, help="Number of features the target depends on")
+    parser.add_argument("--noise", type=float, default=0.5, help="Target noise (regression std / classification temperature)")
+    parser.add_argument("--target_name", default="Target", help="Target column name")
+    parser.add_argument("--decimals", type=int, default=4, help="Decimals kept for numeric values")
+    parser.add_argument("--chunk_rows", type=int, default=100000, help="Rows generated and written per chunk")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--metadata", default=None, help="Write the dataset description (true coefficients etc.) to this JSON file")
+
+    args = parser.parse_args()
+    if not 0 <= args.correlation <= 1:
+        parser.error("--correlation must be between 0 and 1")
+    if not 0 <= args.missing_rate < 1:
+        parser.error("--missing_rate must be in [0, 1)")
+
+    print(json.dumps(generate(args)))